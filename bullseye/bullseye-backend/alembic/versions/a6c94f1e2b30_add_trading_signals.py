@@ -0,0 +1,37 @@
+"""add trading_signals
+
+Revision ID: a6c94f1e2b30
+Revises: f5b83e0a6d19
+Create Date: 2026-10-18 15:05:12.448201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a6c94f1e2b30'
+down_revision = 'f5b83e0a6d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trading_signals',
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('short_window', sa.Integer(), nullable=False),
+    sa.Column('long_window', sa.Integer(), nullable=False),
+    sa.Column('sma_short', sa.Float(), nullable=False),
+    sa.Column('sma_long', sa.Float(), nullable=False),
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('signal', sa.String(), nullable=False),
+    sa.Column('bars_since_cross', sa.Integer(), nullable=True),
+    sa.Column('strength', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('symbol')
+    )
+
+
+def downgrade():
+    op.drop_table('trading_signals')
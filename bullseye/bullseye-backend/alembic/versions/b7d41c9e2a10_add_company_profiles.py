@@ -0,0 +1,32 @@
+"""add company_profiles
+
+Revision ID: b7d41c9e2a10
+Revises: a25cfbd50f5e
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41c9e2a10'
+down_revision = 'a25cfbd50f5e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('company_profiles',
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('exchange', sa.String(), nullable=True),
+    sa.Column('sector', sa.String(), nullable=True),
+    sa.Column('industry', sa.String(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('symbol')
+    )
+
+
+def downgrade():
+    op.drop_table('company_profiles')
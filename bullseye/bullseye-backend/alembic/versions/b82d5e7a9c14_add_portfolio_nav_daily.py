@@ -0,0 +1,31 @@
+"""add portfolio_nav_daily
+
+Revision ID: b82d5e7a9c14
+Revises: a6c94f1e2b30
+Create Date: 2026-10-18 15:48:31.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b82d5e7a9c14'
+down_revision = 'a6c94f1e2b30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('portfolio_nav_daily',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('stock_value', sa.Float(), nullable=False),
+    sa.Column('cash', sa.Float(), nullable=False),
+    sa.Column('nav', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'date')
+    )
+
+
+def downgrade():
+    op.drop_table('portfolio_nav_daily')
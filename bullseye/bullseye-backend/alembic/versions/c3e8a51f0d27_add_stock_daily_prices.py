@@ -0,0 +1,39 @@
+"""add stock_daily_prices
+
+Revision ID: c3e8a51f0d27
+Revises: b7d41c9e2a10
+Create Date: 2026-10-18 10:41:05.533920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a51f0d27'
+down_revision = 'b7d41c9e2a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Older installs created this table from fetch_daily_prices.py via create_all
+    if sa.inspect(op.get_bind()).has_table('stock_daily_prices'):
+        return
+    op.create_table('stock_daily_prices',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('adjusted_close', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('symbol', 'date', name='_symbol_date_uc')
+    )
+    op.create_index(op.f('ix_stock_daily_prices_date'), 'stock_daily_prices', ['date'], unique=False)
+    op.create_index(op.f('ix_stock_daily_prices_id'), 'stock_daily_prices', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_daily_prices_symbol'), 'stock_daily_prices', ['symbol'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_stock_daily_prices_symbol'), table_name='stock_daily_prices')
+    op.drop_index(op.f('ix_stock_daily_prices_id'), table_name='stock_daily_prices')
+    op.drop_index(op.f('ix_stock_daily_prices_date'), table_name='stock_daily_prices')
+    op.drop_table('stock_daily_prices')
@@ -0,0 +1,55 @@
+"""stock_daily_prices: (symbol, date) primary key, OHLCV columns
+
+Revision ID: d4f92b61c8e7
+Revises: b82d5e7a9c14
+Create Date: 2026-10-18 17:12:44.218605
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd4f92b61c8e7'
+down_revision = 'b82d5e7a9c14'
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = [
+    ('open', sa.Float()),
+    ('high', sa.Float()),
+    ('low', sa.Float()),
+    ('close', sa.Float()),
+    ('volume', sa.BigInteger()),
+    ('dividend_amount', sa.REAL()),
+    ('split_coefficient', sa.REAL()),
+]
+
+
+def upgrade():
+    # Nullable, so adding them doesn't rewrite the table; the next full fetch of a symbol fills them
+    for name, type_ in NEW_COLUMNS:
+        op.add_column('stock_daily_prices', sa.Column(name, type_, nullable=True))
+
+    # The id pkey, id and symbol B-trees plus the unique constraint become one covering pkey;
+    # ix_stock_daily_prices_date stays for the "every symbol since <date>" reads
+    op.drop_constraint('_symbol_date_uc', 'stock_daily_prices', type_='unique')
+    op.execute('DROP INDEX IF EXISTS ix_stock_daily_prices_id')
+    op.execute('DROP INDEX IF EXISTS ix_stock_daily_prices_symbol')
+    op.drop_constraint('stock_daily_prices_pkey', 'stock_daily_prices', type_='primary')
+    op.drop_column('stock_daily_prices', 'id')
+    op.execute(
+        'ALTER TABLE stock_daily_prices ADD CONSTRAINT stock_daily_prices_pkey '
+        'PRIMARY KEY (symbol, date) INCLUDE (adjusted_close)'
+    )
+
+
+def downgrade():
+    op.drop_constraint('stock_daily_prices_pkey', 'stock_daily_prices', type_='primary')
+    # SERIAL numbers the existing rows
+    op.execute('ALTER TABLE stock_daily_prices ADD COLUMN id SERIAL')
+    op.create_primary_key('stock_daily_prices_pkey', 'stock_daily_prices', ['id'])
+    op.create_unique_constraint('_symbol_date_uc', 'stock_daily_prices', ['symbol', 'date'])
+    op.create_index(op.f('ix_stock_daily_prices_id'), 'stock_daily_prices', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_daily_prices_symbol'), 'stock_daily_prices', ['symbol'], unique=False)
+    for name, _ in reversed(NEW_COLUMNS):
+        op.drop_column('stock_daily_prices', name)
@@ -0,0 +1,33 @@
+"""add symbol_ingestion_state
+
+Revision ID: d91f6b2c7e48
+Revises: c3e8a51f0d27
+Create Date: 2026-10-18 11:27:52.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd91f6b2c7e48'
+down_revision = 'c3e8a51f0d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('symbol_ingestion_state',
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('first_stored_date', sa.Date(), nullable=True),
+    sa.Column('last_stored_date', sa.Date(), nullable=True),
+    sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('last_success_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('last_full_fetch_at', sa.DateTime(), nullable=True),
+    sa.Column('needs_backfill', sa.Boolean(), server_default=sa.false(), nullable=False),
+    sa.PrimaryKeyConstraint('symbol')
+    )
+
+
+def downgrade():
+    op.drop_table('symbol_ingestion_state')
@@ -0,0 +1,31 @@
+"""add backtest_results
+
+Revision ID: e4a27d9c1b53
+Revises: d91f6b2c7e48
+Create Date: 2026-10-18 13:05:31.772610
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e4a27d9c1b53'
+down_revision = 'd91f6b2c7e48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('backtest_results',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('request', sa.JSON(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=False),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+
+
+def downgrade():
+    op.drop_table('backtest_results')
@@ -0,0 +1,33 @@
+"""add ingestion_runs
+
+Revision ID: e7b25c9d4a16
+Revises: d4f92b61c8e7
+Create Date: 2026-10-18 16:42:09.318254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7b25c9d4a16'
+down_revision = 'd4f92b61c8e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ingestion_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=False),
+    sa.Column('symbols', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('deferred', sa.Integer(), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('seconds', sa.Float(), nullable=False),
+    sa.Column('rows_per_second', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('ingestion_runs')
@@ -0,0 +1,30 @@
+"""add indicator_state
+
+Revision ID: f5b83e0a6d19
+Revises: e4a27d9c1b53
+Create Date: 2026-10-18 14:22:47.310985
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f5b83e0a6d19'
+down_revision = 'e4a27d9c1b53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('indicator_state',
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('last_date', sa.Date(), nullable=False),
+    sa.Column('state', sa.JSON(), nullable=False),
+    sa.Column('latest', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('symbol')
+    )
+
+
+def downgrade():
+    op.drop_table('indicator_state')
@@ -1,4 +1,6 @@
+from fastapi import Request
 from app.services.alpha_vantage_service import AlphaVantageService
 
-def get_alpha_vantage_service():
-    return AlphaVantageService()
+def get_alpha_vantage_service(request: Request) -> AlphaVantageService:
+    # Created once in the app lifespan (main.py) and shared by every request
+    return request.app.state.alpha_vantage_service
@@ -3,28 +3,29 @@ from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from datetime import datetime, timedelta
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, Token
+from app.core.crud import authenticate_user
 from app.core.database import get_db
+from app.core.metrics import register_cache
+from app.core.passwords import hash_password
+from app.services.alpha_vantage_service import QuoteCache
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Authenticated user rows are cached briefly; writes to a user row must call invalidate_cached_user
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def hash_password(password):
-    return pwd_context.hash(password)
+user_cache = QuoteCache(ttl=USER_CACHE_TTL_SECONDS, max_entries=USER_CACHE_MAX_ENTRIES)
+register_cache("user", user_cache)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -40,7 +41,7 @@ async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    new_user = User(email=user.email, hashed_password=hash_password(user.password))
+    new_user = User(email=user.email, hashed_password=await hash_password(user.password))
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
@@ -52,14 +53,25 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await authenticate_user(db, user, form_data.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     access_token = create_access_token(data={"sub": str(user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
 
-# Get current user from token
-async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)):
+@router.get("/auth/cache/stats")
+async def get_user_cache_stats():
+    return user_cache.stats()
+
+def invalidate_cached_user(user_id: int) -> None:
+    user_cache.invalidate(str(user_id))
+
+def _detached_user(user: User) -> User:
+    # Column values only, not bound to any session, so it can be shared across requests
+    return User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+# User id from the token alone, for routes that don't need the user row
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
     credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -68,9 +80,16 @@ async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depe
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    return int(user_id)
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+# Get current user from token
+async def get_current_user(db: AsyncSession = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    async def fetch():
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        return _detached_user(user) if user is not None else None
+
+    user = await user_cache.get_or_fetch(str(user_id), fetch)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
     return user
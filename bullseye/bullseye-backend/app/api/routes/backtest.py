@@ -0,0 +1,179 @@
+import json
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.api.routes.auth import get_current_user, get_current_user_id
+from app.core.crud import get_user_stocks
+from app.models import User
+from app.schemas.backtest import (
+    BacktestRequest,
+    BacktestResult,
+    PortfolioBacktestRequest,
+    PortfolioBacktestResult,
+    SweepRequest,
+)
+from app.services.backtest import run_sma_crossover
+from app.services.backtest_jobs import backtest_jobs
+from app.services.portfolio_backtest import build_price_matrix, run_portfolio_crossover
+from app.services.price_cache import load_prices, price_cache, sync_symbol
+from app.services.sweep import run_sweep
+
+# Upper bound on short x long pairs per sweep; each pair is evaluated for every symbol
+# (at most SweepRequest's 50) on the shared process pool
+MAX_SWEEP_PAIRS = 5_000
+
+router = APIRouter()
+
+def _sweep_windows(request: SweepRequest):
+    short_windows = np.arange(request.short_windows.start, request.short_windows.stop + 1, request.short_windows.step)
+    long_windows = np.arange(request.long_windows.start, request.long_windows.stop + 1, request.long_windows.step)
+    if len(short_windows) == 0 or len(long_windows) == 0:
+        raise HTTPException(status_code=400, detail="Window ranges must not be empty")
+    if len(short_windows) * len(long_windows) > MAX_SWEEP_PAIRS:
+        raise HTTPException(status_code=400, detail=f"Grid larger than {MAX_SWEEP_PAIRS} window pairs")
+    return short_windows, long_windows
+
+async def _user_holdings(db: AsyncSession, user_id: int) -> dict:
+    holdings = await get_user_stocks(db, user_id=user_id)
+    shares_by_symbol = {}
+    for holding in holdings:
+        symbol = holding.symbol.upper()
+        shares_by_symbol[symbol] = shares_by_symbol.get(symbol, 0) + (holding.shares or 0)
+    if not shares_by_symbol:
+        raise HTTPException(status_code=404, detail="Portfolio has no holdings to backtest")
+    return shares_by_symbol
+
+@router.post("/backtest", response_model=BacktestResult)
+async def run_backtest(
+    request: BacktestRequest,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    symbol = request.symbol.upper()
+    series = await load_prices(db, symbol, request.start_date, request.end_date)
+    if series is None or len(series[0]) == 0:
+        raise HTTPException(status_code=404, detail=f"No price history stored for {symbol}")
+
+    dates, closes = series
+    try:
+        result = run_sma_crossover(
+            dates,
+            closes,
+            short_window=request.short_window,
+            long_window=request.long_window,
+            initial_capital=request.initial_capital,
+            commission=request.commission,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"symbol": symbol, **result}
+
+@router.post("/backtest/sweep")
+async def sweep_backtest_windows(
+    request: SweepRequest,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    short_windows, long_windows = _sweep_windows(request)
+
+    try:
+        return await run_sweep(
+            db,
+            request.symbols,
+            short_windows,
+            long_windows,
+            start=request.start_date,
+            end=request.end_date,
+            commission=request.commission,
+            metric=request.metric,
+            top_n=request.top_n,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/backtest/portfolio", response_model=PortfolioBacktestResult)
+async def run_portfolio_backtest(
+    request: PortfolioBacktestRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    shares_by_symbol = await _user_holdings(db, current_user.id)
+    symbols = sorted(shares_by_symbol)
+    for symbol in symbols:
+        if not price_cache.has(symbol):
+            await sync_symbol(db, price_cache, symbol, rebuild=True)
+
+    calendar, prices = build_price_matrix(price_cache, symbols, request.start_date, request.end_date)
+    try:
+        result = run_portfolio_crossover(
+            symbols,
+            calendar,
+            prices,
+            initial_shares=np.array([shares_by_symbol[s] for s in symbols], dtype=np.float64),
+            initial_cash=current_user.cash_balance or 0.0,
+            short_window=request.short_window,
+            long_window=request.long_window,
+            commission=request.commission,
+            rebalance_every=request.rebalance_every,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"symbols": symbols, **result}
+
+# --- Background jobs: submit returns a job id; identical requests share one run/result ---
+
+@router.post("/backtest/jobs/backtest")
+async def submit_backtest_job(
+    request: BacktestRequest,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    params = request.model_dump(mode="json")
+    params["symbol"] = params["symbol"].upper()
+    job = await backtest_jobs.submit(db, "backtest", params, [params["symbol"]])
+    return job.snapshot()
+
+@router.post("/backtest/jobs/sweep")
+async def submit_sweep_job(
+    request: SweepRequest,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    _sweep_windows(request)
+    params = request.model_dump(mode="json")
+    params["symbols"] = list(dict.fromkeys(s.upper() for s in params["symbols"]))
+    job = await backtest_jobs.submit(db, "sweep", params, params["symbols"])
+    return job.snapshot()
+
+@router.post("/backtest/jobs/portfolio")
+async def submit_portfolio_backtest_job(
+    request: PortfolioBacktestRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    params = request.model_dump(mode="json")
+    params["holdings"] = await _user_holdings(db, current_user.id)
+    params["cash"] = current_user.cash_balance or 0.0
+    job = await backtest_jobs.submit(db, "portfolio", params, sorted(params["holdings"]))
+    return job.snapshot()
+
+@router.get("/backtest/jobs/{job_id}")
+async def get_backtest_job(job_id: str, user_id: int = Depends(get_current_user_id)):
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@router.get("/backtest/jobs/{job_id}/events")
+async def stream_backtest_job(job_id: str, user_id: int = Depends(get_current_user_id)):
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for snapshot in job.events():
+            yield f"event: {snapshot['status']}\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,53 @@
+from datetime import date
+from typing import Optional
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.models import IndicatorState
+from app.schemas.symbol import Symbol
+from app.services.indicators import batch_indicators
+from app.services.price_cache import load_prices
+
+router = APIRouter()
+
+@router.get("/indicators/{symbol}")
+async def get_latest_indicators(
+    symbol: Symbol,
+    names: Optional[str] = Query(None, description="Comma-separated indicator names, e.g. rsi_14,macd"),
+    db: AsyncSession = Depends(get_db),
+):
+    record = await db.get(IndicatorState, symbol.upper())
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"No indicators computed for {symbol.upper()}")
+    values = record.latest
+    if names:
+        values = {name: values.get(name) for name in names.split(",")}
+    return {"symbol": record.symbol, "date": record.last_date, "values": values}
+
+@router.get("/indicators/{symbol}/history")
+async def get_indicator_history(
+    symbol: Symbol,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    # Indicators need warm-up bars, so compute over the full series and slice afterwards
+    series = await load_prices(db, symbol.upper())
+    if series is None or len(series[0]) == 0:
+        raise HTTPException(status_code=404, detail=f"No price history stored for {symbol.upper()}")
+    dates, closes = series
+    values = batch_indicators(closes)
+
+    mask = slice(
+        int(dates.searchsorted(np.datetime64(start, "D"))) if start else 0,
+        int(dates.searchsorted(np.datetime64(end, "D"), side="right")) if end else len(dates),
+    )
+    return {
+        "symbol": symbol.upper(),
+        "dates": dates[mask].astype(str).tolist(),
+        "values": {
+            name: [None if v != v else round(float(v), 6) for v in column[mask]]
+            for name, column in values.items()
+        },
+    }
@@ -1,100 +1,143 @@
+import logging
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.models import PortfolioStock, User
-from app.schemas.portfolio import PortfolioSummary, StockCreate, StockOut
+from app.models import CompanyProfile, PortfolioStock, User
+from app.schemas.portfolio import NavPoint, PortfolioSummary, StockCreate, StockOut
 from app.schemas.cashbal import CashUpdate, CashBalanceOut
-from app.api.routes.auth import get_current_user
+from app.api.routes.auth import get_current_user, get_current_user_id, invalidate_cached_user
 from app.services.alpha_vantage_service import AlphaVantageService
-from crud import add_stock, get_latest_trading_day_price, remove_stock, update_stock, get_user_stocks
+from app.services.company_profile_service import ensure_company_profile
+from app.services.response_cache import cached_json_response, invalidate_user_responses, user_version
+from app.core.crud import add_stock, get_portfolio_nav, get_previous_closes, remove_stock, update_stock, get_user_stocks
 from app.schemas.portfolio import StockUpdate
-from requests import Session
+from app.schemas.symbol import Symbol
 from app.api.dependencies import get_alpha_vantage_service
 
 router = APIRouter()
-alpha_service = AlphaVantageService()
+logger = logging.getLogger(__name__)
 
 @router.post("/portfolio/add", response_model=StockOut)
-async def add_to_portfolio(stock: StockCreate, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
+async def add_to_portfolio(
+    stock: StockCreate,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    alpha_service: AlphaVantageService = Depends(get_alpha_vantage_service),
+):
     # Validate stock symbol and get live price
     try:
         price_data = await alpha_service.get_stock_price(stock.symbol.upper())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # Company name comes from the stored profile (fetched once on first sight), not the client.
+    # The profile is optional: if OVERVIEW fails, store the symbol and let the scheduled
+    # profile refresh fill the name in later, since GET /portfolio prefers the profile's name.
+    try:
+        profile = await ensure_company_profile(db, alpha_service, stock.symbol)
+    except Exception as e:
+        logger.warning("Could not load company profile for %s: %s", stock.symbol.upper(), e)
+        await db.rollback()
+        profile = None
+    name = profile.name if profile and profile.name else stock.symbol.upper()
+
     # Add stock to DB (shares + price at purchase)
-    # Assuming you have a CRUD function add_stock(db, user_id, stock, price)
-    added_stock = await add_stock(db, user.id, stock, price_data["price"])
+    added_stock = await add_stock(db, user_id, stock, price_data["price"], name=name)
+    invalidate_user_responses(user_id)
     
     # Return enriched StockOut response (you might want to adjust StockOut schema accordingly)
     return added_stock
 
 @router.delete("/portfolio/remove/{symbol}")
-async def remove_from_portfolio(symbol: str, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
-    deleted = await remove_stock(db, user.id, symbol.upper())
+async def remove_from_portfolio(symbol: Symbol, db: AsyncSession = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    deleted = await remove_stock(db, user_id, symbol.upper())
     if not deleted:
         raise HTTPException(status_code=404, detail="Stock not found in portfolio")
+    invalidate_user_responses(user_id)
     return {"detail": f"{symbol.upper()} removed from portfolio"}
 
-@router.get("/portfolio", response_model=list[dict])
-async def get_portfolio(db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
-    stmt = select(PortfolioStock).where(PortfolioStock.user_id == user.id)
+async def _build_portfolio(db: AsyncSession, user_id: int, alpha_service: AlphaVantageService):
+    # Names are joined from company_profiles, so metadata costs no upstream calls
+    stmt = (
+        select(PortfolioStock, CompanyProfile.name)
+        .outerjoin(CompanyProfile, CompanyProfile.symbol == PortfolioStock.symbol)
+        .where(PortfolioStock.user_id == user_id)
+    )
     result = await db.execute(stmt)
-    holdings = result.scalars().all()
+    holdings = result.all()
+
+    # Value every distinct symbol concurrently; a slow or failed symbol only degrades its own row
+    symbols = [stock.symbol.upper() for stock, _ in holdings]
+    quotes = await alpha_service.get_stock_prices(symbols)
 
     portfolio_data = []
 
-    for stock in holdings:
+    for stock, profile_name in holdings:
         symbol = stock.symbol.upper()
         shares = stock.shares
+        price_data = quotes.get(symbol)
+        company_name = profile_name or stock.name or symbol
 
-        try:
-            price_data = await alpha_service.get_stock_price(symbol)
-            company_info = await alpha_service.get_company_overview(symbol)
-            company_name = company_info.get("Name", symbol) if company_info else symbol
-            value = shares * price_data["price"]
-
+        if isinstance(price_data, Exception):
             portfolio_data.append({
                 "symbol": symbol,
                 "name": company_name,
                 "shares": shares,
-                "price": price_data["price"],
-                "change": price_data["change"],
-                "percent_change": price_data["percent_change"],
-                "value": value,
-            })
-        except Exception as e:
-            portfolio_data.append({
-                "symbol": symbol,
-                "name": symbol,
-                "shares": shares,
                 "price": None,
                 "change": None,
                 "percent_change": None,
                 "value": None,
-                "error": str(e),
+                "error": str(price_data),
             })
+            continue
+
+        portfolio_data.append({
+            "symbol": symbol,
+            "name": company_name,
+            "shares": shares,
+            "price": price_data["price"],
+            "change": price_data["change"],
+            "percent_change": price_data["percent_change"],
+            "value": shares * price_data["price"],
+            "stale": price_data.get("stale", False),
+        })
+
+    return portfolio_data, symbols
 
-    return portfolio_data
+@router.get("/portfolio", response_model=list[dict])
+async def get_portfolio(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    alpha_service: AlphaVantageService = Depends(get_alpha_vantage_service),
+):
+    # Idle polls are answered from the response cache (304 when the client is current)
+    # until the user's holdings or cash change or one of the quotes is refreshed
+    return await cached_json_response(
+        request, f"portfolio:{user_id}", lambda: _build_portfolio(db, user_id, alpha_service), user_version(user_id)
+    )
 
 @router.get("/portfolio/cash", response_model=CashBalanceOut)
-async def get_cash_balance(db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
-    stmt = select(User).where(User.id == user.id)
-    result = await db.execute(stmt)
-    db_user = result.scalar_one()
-    return {"cash_balance": db_user.cash_balance}
+async def get_cash_balance(request: Request, user=Depends(get_current_user)):
+    # The cached user row is invalidated on every cash update, so it is current here
+    async def compute():
+        return {"cash_balance": user.cash_balance}, []
+    return await cached_json_response(request, f"portfolio_cash:{user.id}", compute, user_version(user.id))
 
 @router.post("/portfolio/cash", response_model=CashBalanceOut)
-async def update_cash_balance(cash: CashUpdate, db: AsyncSession = Depends(get_db), user=Depends(get_current_user)):
-    stmt = select(User).where(User.id == user.id)
+async def update_cash_balance(cash: CashUpdate, db: AsyncSession = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    stmt = select(User).where(User.id == user_id)
     result = await db.execute(stmt)
     db_user = result.scalar_one()
 
     db_user.cash_balance += cash.amount
     await db.commit()
     await db.refresh(db_user)
+    invalidate_cached_user(user_id)
+    invalidate_user_responses(user_id)
 
     return {"cash_balance": db_user.cash_balance}
 
@@ -102,69 +145,99 @@ async def update_cash_balance(cash: CashUpdate, db: AsyncSession = Depends(get_d
 async def update_portfolio_stock(
     stock_data: StockUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
-    stock = await update_stock(current_user.id, stock_data, db)
+    stock = await update_stock(user_id, stock_data, db)
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found in portfolio.")
+    invalidate_user_responses(user_id)
     return {"message": "Stock updated successfully"}
 
-@router.get("/portfolio/summary", response_model=PortfolioSummary)
-async def get_portfolio_summary_metrics(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    av_service: AlphaVantageService = Depends(get_alpha_vantage_service) # Assuming get_alpha_vantage_service is a dependency
-):
+async def _build_summary(db: AsyncSession, current_user: User, av_service: AlphaVantageService):
+    # A fixed number of round-trips however many positions are held: one query for the
+    # holdings, one for every previous close, one concurrent batch of live quotes.
+    # Cash comes from the already-loaded user row.
     holdings = await get_user_stocks(db, user_id=current_user.id)
-    cash_balance = await get_cash_balance(db, user_id=current_user.id)
+    cash_balance = current_user.cash_balance or 0.0
+
+    shares_by_symbol = {}
+    for holding in holdings:
+        symbol = holding.symbol.upper()
+        shares_by_symbol[symbol] = shares_by_symbol.get(symbol, 0) + holding.shares
+
+    # Latest stored close on or before yesterday, so weekends and holidays fall back to the last session
+    target_yesterday = date.today() - timedelta(days=1)
+    previous_closes = await get_previous_closes(db, shares_by_symbol, target_yesterday)
+    quotes = await av_service.get_stock_prices(shares_by_symbol)
 
     current_stock_value = 0.0
+    day_change_value = 0.0
     yesterday_stock_value = 0.0
-    
-    # Try to find yesterday's actual trading date
-    # This logic should ideally be more robust to handle multiple non-trading days in a row
-    # For now, we'll try yesterday, and if not found, iterate backwards.
-    target_yesterday = date.today() - timedelta(days=1)
-    
-    for holding in holdings:
-        # Get current live price
-        current_data = await av_service.get_stock_quote(holding.symbol)
-        if current_data and "Global Quote" in current_data and "05. price" in current_data["Global Quote"]:
-            current_price = float(current_data["Global Quote"]["05. price"])
-            current_stock_value += holding.shares * current_price
-        else:
-            # Handle cases where live price fetch fails for a stock
-            print(f"Warning: Could not get live price for {holding.symbol}")
-            # Optionally, use stored last known price or exclude from calculation
-            # For simplicity, we'll just skip this stock for current value if live data fails
-            
-        # Get yesterday's closing price from your database
-        yesterday_price_entry = await get_latest_trading_day_price(db, holding.symbol, target_yesterday)
-
-        if yesterday_price_entry:
-            yesterday_stock_value += holding.shares * yesterday_price_entry.adjusted_close
-        else:
-            # If no historical price for yesterday, this stock won't contribute to day's change calculation
-            print(f"Warning: No historical price for {holding.symbol} on or before {target_yesterday}. Skipping for day's change.")
+    for symbol, shares in shares_by_symbol.items():
+        quote = quotes.get(symbol)
+        if quote is None or isinstance(quote, Exception):
+            # Skip this position rather than failing the whole summary
+            logger.warning("Could not get live price for %s: %s", symbol, quote)
+            continue
+        current_stock_value += shares * quote["price"]
+
+        previous_close = previous_closes.get(symbol)
+        if previous_close is None:
+            # No stored history yet, so this position can't contribute to the day's change
+            logger.warning("No historical price for %s on or before %s; skipping for day's change", symbol, target_yesterday)
+            continue
+        yesterday_stock_value += shares * previous_close
+        day_change_value += shares * (quote["price"] - previous_close)
 
     current_total_portfolio_value = current_stock_value + cash_balance
-
-    # Calculate yesterday's total portfolio value.
-    # If yesterday_stock_value is 0 because no historical data was found for any stock,
-    # the day's change calculation might be inaccurate.
-    # Consider what "yesterday's cash balance" means: usually it's considered the same unless you log cash changes daily too.
+    # Cash is assumed unchanged since yesterday; cash movements aren't logged daily
     yesterday_total_portfolio_value = yesterday_stock_value + cash_balance
 
-    day_change_value = current_total_portfolio_value - yesterday_total_portfolio_value
-    
     # Avoid division by zero
     if yesterday_total_portfolio_value > 0:
         day_change_percent = (day_change_value / yesterday_total_portfolio_value) * 100
     else:
-        day_change_percent = 0.0 # Or handle as None/NaN if preferred
+        day_change_percent = 0.0
 
-    return {
+    summary = {
         "current_total_value": round(current_total_portfolio_value, 2),
         "days_change_value": round(day_change_value, 2),
         "days_change_percent": round(day_change_percent,2)
-    }
\ No newline at end of file
+    }
+    return summary, shares_by_symbol
+
+@router.get("/portfolio/summary", response_model=PortfolioSummary)
+async def get_portfolio_summary_metrics(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    av_service: AlphaVantageService = Depends(get_alpha_vantage_service)
+):
+    return await cached_json_response(
+        request,
+        f"portfolio_summary:{current_user.id}",
+        lambda: _build_summary(db, current_user, av_service),
+        user_version(current_user.id),
+    )
+
+@router.get("/portfolio/nav", response_model=list[NavPoint])
+async def get_portfolio_nav_history(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    # Materialized nightly into portfolio_nav_daily, so this is one range scan on (user_id, date)
+    rows = await get_portfolio_nav(db, user_id, start, end)
+    points = []
+    peak = 0.0
+    for row in rows:
+        peak = max(peak, row.nav)
+        points.append({
+            "date": row.date,
+            "stock_value": row.stock_value,
+            "cash": row.cash,
+            "nav": row.nav,
+            "drawdown": row.nav / peak - 1.0 if peak > 0 else 0.0,
+        })
+    return points
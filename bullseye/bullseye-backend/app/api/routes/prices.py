@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from app.api.routes.auth import get_current_user_id
+from app.services.price_stream import PRICE_STREAM_SEND_TIMEOUT_SECONDS, PriceHub, Subscription
+
+router = APIRouter()
+
+# Protocol (JSON text frames):
+#   client -> {"action": "subscribe" | "unsubscribe", "symbols": ["AAPL", "MSFT"]}
+#   server -> {"type": "prices", "data": {"AAPL": {"price": ..., "change": ..., "percent_change": ...}}}
+#             {"type": "subscribed", "symbols": [...]} / {"type": "error", "detail": "..."}
+# Browsers cannot set headers on a WebSocket, so the bearer token comes in ?token=
+
+async def _send_updates(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        batch = await subscription.next_batch()
+        try:
+            await asyncio.wait_for(websocket.send_json({"type": "prices", "data": batch}), PRICE_STREAM_SEND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # Too slow to take even coalesced updates; let it reconnect instead of holding a stuck socket
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+
+async def _receive_commands(websocket: WebSocket, hub: PriceHub, subscription: Subscription) -> None:
+    while True:
+        try:
+            message = json.loads(await websocket.receive_text())
+            action, symbols = message.get("action"), message.get("symbols") or []
+            if not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols):
+                raise ValueError("symbols must be a list of strings")
+            if action == "subscribe":
+                hub.subscribe(subscription, symbols)
+            elif action == "unsubscribe":
+                hub.unsubscribe(subscription, symbols)
+            else:
+                raise ValueError(f"Unknown action {action!r}")
+            await websocket.send_json({"type": "subscribed", "symbols": sorted(subscription.symbols)})
+        except (ValueError, AttributeError) as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+
+@router.websocket("/ws/prices")
+async def stream_prices(websocket: WebSocket, token: str = Query(...), symbols: Optional[str] = Query(None)):
+    try:
+        await get_current_user_id(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    hub: PriceHub = websocket.app.state.price_hub
+    subscription = Subscription()
+    await websocket.accept()
+    tasks = []
+    try:
+        if symbols:
+            try:
+                hub.subscribe(subscription, [s.strip() for s in symbols.split(",") if s.strip()])
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.send_json({"type": "subscribed", "symbols": sorted(subscription.symbols)})
+
+        tasks = [
+            asyncio.create_task(_send_updates(websocket, subscription)),
+            asyncio.create_task(_receive_commands(websocket, hub, subscription)),
+        ]
+        # Either side ending (client gone, slow consumer closed) ends the connection
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        hub.unsubscribe(subscription)
+
+@router.get("/ws/prices/stats")
+async def get_price_stream_stats(request: Request):
+    return request.app.state.price_hub.stats()
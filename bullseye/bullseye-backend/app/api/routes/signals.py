@@ -0,0 +1,31 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.crud import get_trading_signals
+from app.core.database import get_db
+from app.schemas.signal import TradingSignalOut
+from app.schemas.symbol import Symbol
+
+router = APIRouter()
+
+# Bound the IN (...) list of a single dashboard request
+MAX_SIGNAL_SYMBOLS = 500
+
+@router.get("/signals", response_model=List[TradingSignalOut])
+async def get_signals(
+    symbols: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT"),
+    db: AsyncSession = Depends(get_db),
+):
+    requested = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    if len(requested) > MAX_SIGNAL_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SIGNAL_SYMBOLS} symbols per request")
+    # Materialized by ingestion, so a whole watchlist is one primary-key lookup
+    signals = await get_trading_signals(db, requested)
+    return [signals[s] for s in dict.fromkeys(requested) if s in signals]
+
+@router.get("/signals/{symbol}", response_model=TradingSignalOut)
+async def get_signal(symbol: Symbol, db: AsyncSession = Depends(get_db)):
+    signals = await get_trading_signals(db, [symbol])
+    if symbol.upper() not in signals:
+        raise HTTPException(status_code=404, detail=f"No signal computed for {symbol.upper()}")
+    return signals[symbol.upper()]
@@ -1,17 +1,77 @@
-from fastapi import APIRouter, HTTPException
-from app.services.alpha_vantage_service import get_stock_price
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.dependencies import get_alpha_vantage_service
+from app.api.routes.auth import get_current_user_id
+from app.core.crud import get_stored_price_ranges
+from app.core.database import get_db
+from app.services.alpha_vantage_service import AlphaVantageService, quote_cache, upstream_scheduler
+from app.services.price_cache import load_prices, price_cache
+from app.services.price_history import (
+    BINARY_MEDIA_TYPE, DEFAULT_HISTORY_POINTS, MAX_HISTORY_POINTS, downsample, encode_binary, encode_columns,
+)
+from app.services.rate_scheduler import BudgetExhausted
+from app.services.response_cache import cached_json_response
+from app.schemas.symbol import Symbol
 
 router = APIRouter()
 
-@router.get("/stock/{symbol}")
-async def get_stock_data(symbol: str):
+@router.get("/stock/cache/stats")
+async def get_quote_cache_stats():
+    return {**quote_cache.stats(), "rate_budget": upstream_scheduler.stats()}
+
+async def _build_stock_data(symbol: str, alpha_service: AlphaVantageService):
     try:
-        price = await get_stock_price(symbol)
+        price = await alpha_service.get_stock_price(symbol)
         return {
-            "symbol": symbol.upper(),
+            "symbol": symbol,
             "price": price["price"],
             "change": price["change"],
             "percent_change": price["percent_change"],
-        }
+            # set when the rate budget is exhausted and we're serving the last known quote
+            "stale": price.get("stale", False),
+        }, [symbol]
+    except BudgetExhausted as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stock/{symbol}")
+async def get_stock_data(request: Request, symbol: Symbol, alpha_service: AlphaVantageService = Depends(get_alpha_vantage_service)):
+    # Shared by every client; rebuilt only when the quote is refreshed
+    symbol = symbol.upper()
+    return await cached_json_response(
+        request, f"stock:{symbol}", lambda: _build_stock_data(symbol, alpha_service), private=False
+    )
+
+@router.get("/stock/{symbol}/history")
+async def get_stock_history(
+    symbol: Symbol,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    points: int = Query(DEFAULT_HISTORY_POINTS, ge=3, le=MAX_HISTORY_POINTS, description="Maximum points returned"),
+    format: str = Query("json", pattern="^(json|binary)$", description="json (parallel arrays) or binary"),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    symbol = symbol.upper()
+    # An empty range is a valid answer; a symbol with no stored rows at all is not. Check before
+    # load_prices so an unknown symbol never gets (empty) cache files written for it
+    if not price_cache.has(symbol) and symbol not in await get_stored_price_ranges(db, [symbol]):
+        raise HTTPException(status_code=404, detail=f"No price history stored for {symbol}")
+    # Columnar cache of stock_daily_prices, so a range is a zero-copy slice rather than a DB scan
+    series = await load_prices(db, symbol, start, end)
+    if series is None or price_cache.last_date(symbol) is None:
+        raise HTTPException(status_code=404, detail=f"No price history stored for {symbol}")
+    total = len(series[0])
+    # Shape-preserving downsampling to the chart's point budget
+    dates, closes = downsample(*series, points)
+
+    if format == "binary":
+        return Response(
+            content=encode_binary(dates, closes),
+            media_type=BINARY_MEDIA_TYPE,
+            headers={"X-Points": str(len(dates)), "X-Source-Points": str(total)},
+        )
+    return encode_columns(symbol, dates, closes, total)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.api.routes.auth import get_current_user
+from app.api.routes.auth import get_current_user, get_current_user_id, invalidate_cached_user
 from app.models import User
+from app.services.response_cache import invalidate_user_responses
 from sqlalchemy import update
 from fastapi.responses import JSONResponse
 
@@ -16,14 +17,16 @@ async def get_cash_balance(user: User = Depends(get_current_user)):
 async def update_cash_balance(
     amount: float,
     session: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     stmt = (
         update(User)
-        .where(User.id == user.id)
+        .where(User.id == user_id)
         .values(cash_balance=amount)
         .execution_options(synchronize_session="fetch")
     )
     await session.execute(stmt)
     await session.commit()
+    invalidate_cached_user(user_id)
+    invalidate_user_responses(user_id)
     return JSONResponse(content={"message": "Cash balance updated", "cash_balance": amount})
@@ -1,43 +1,38 @@
 # app/core/crud.py
 
 from datetime import date
-from requests import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models import User
 from app.schemas.user import UserCreate
-from passlib.context import CryptContext
-import logging # Added for logging
+from app.core.passwords import hash_password, verify_password
+import logging
 from app.models.portfoliostock import PortfolioStock
 from app.schemas.portfolio import StockUpdate
 from app.schemas.portfolio import StockCreate, StockOut
 from sqlalchemy.exc import IntegrityError
 from app.models.dailyprice import StockDailyPrice
+from app.models.companyprofile import CompanyProfile
+from app.models.ingestionstate import SymbolIngestionState
+from app.models.ingestionrun import IngestionRun
+from app.models.tradingsignal import TradingSignal
+from app.models.portfolionav import PortfolioNavDaily
+from datetime import datetime
+from sqlalchemy import func, true, tuple_, update
+from sqlalchemy.dialects.postgresql import array as pg_array, insert as pg_insert
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Set up a basic logger for CRUD operations
+# Handlers and level are configured once in app.core.logging_config
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-# If you want to see logs in console during uvicorn run, uncomment these lines:
-handler = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 
 
 async def get_user_by_email(db: AsyncSession, email: str):
-    print(f"DEBUG: Attempting to get user by email: {email}")
     result = await db.execute(select(User).filter(User.email == email))
     user = result.scalars().first()
-    if user:
-        print(f"DEBUG: Found existing user: {user.email}")
-    else:
-        print(f"DEBUG: No user found for email: {email}")
+    logger.debug("User lookup by email: %s", "found" if user else "not found")
     return user
 
 async def create_user(db: AsyncSession, user: UserCreate):
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(
         email=user.email,
         first_name=user.first_name,
@@ -47,33 +42,31 @@ async def create_user(db: AsyncSession, user: UserCreate):
     
     db.add(db_user)
     
-    print(f"DEBUG: Added user {db_user.email} to session. Pending: {db.new}")
-    logger.info(f"Attempting to commit user {db_user.email} to database.") 
-    
     try:
         await db.commit() # This is the crucial step to save to the database
-        print(f"DEBUG: Successfully committed user {db_user.email} to database.")
-        logger.info(f"User {db_user.email} successfully committed.")
     except Exception as e:
         await db.rollback() # Rollback the transaction on error
-        print(f"ERROR: Failed to commit user {db_user.email}: {e}")
-        logger.error(f"Failed to commit user {db_user.email}: {e}", exc_info=True) # Logs traceback
+        logger.error("Failed to commit new user: %s", e, exc_info=True)
         raise # Re-raise the exception to propagate it up to the FastAPI endpoint
         
     await db.refresh(db_user) # Refresh to get the generated ID and other DB-side defaults
-    print(f"DEBUG: Refreshed user, ID: {db_user.id}")
-    logger.info(f"User {db_user.email} refreshed with ID: {db_user.id}.")
+    logger.info("Created user", extra={"user_id": db_user.id})
     return db_user
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def authenticate_user(db: AsyncSession, user: User, password: str) -> bool:
+    """Verify a password off the event loop, upgrading the stored hash if its cost factor changed."""
+    valid, new_hash = await verify_password(password, user.hashed_password)
+    if valid and new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return valid
 
-async def add_stock(db: AsyncSession, user_id: int, stock: StockCreate, price: float):
+async def add_stock(db: AsyncSession, user_id: int, stock: StockCreate, price: float, name: str = None):
     new_stock = PortfolioStock(
         user_id=user_id,
         symbol=stock.symbol.upper(),
-        name=stock.name,
+        name=name or stock.symbol.upper(),
         shares=stock.shares,
         purchase_price=price
     )
@@ -117,30 +110,181 @@ async def update_stock(user_id: int, stock_data: StockUpdate, db: AsyncSession):
     return stock
 
 
-def create_stock_daily_price(db: Session, symbol: str, date: date, adjusted_close: float):
-    db_price = StockDailyPrice(symbol=symbol, date=date, adjusted_close=adjusted_close)
-    db.add(db_price)
-    try:
-        db.commit()
-        db.refresh(db_price)
-        return db_price
-    except IntegrityError:
-        db.rollback()
-        # Price for this symbol and date already exists, which is fine for upsert logic
-        return None # Or fetch existing to return it if needed
-
-def get_stock_price_on_date(db: Session, symbol: str, target_date: date):
-    return db.query(StockDailyPrice).filter(
-        StockDailyPrice.symbol == symbol,
-        StockDailyPrice.date == target_date
-    ).first()
-
-def get_latest_trading_day_price(db: Session, symbol: str, before_date: date):
+async def get_company_profiles(db: AsyncSession, symbols):
+    symbols = {s.upper() for s in symbols}
+    if not symbols:
+        return {}
+    result = await db.execute(select(CompanyProfile).where(CompanyProfile.symbol.in_(symbols)))
+    return {profile.symbol: profile for profile in result.scalars().all()}
+
+async def upsert_company_profile(db: AsyncSession, symbol: str, overview: dict, commit: bool = True):
+    """
+    Insert or refresh the stored OVERVIEW metadata for a symbol and copy the
+    name onto any portfolio rows holding it.
+    """
+    symbol = symbol.upper()
+    values = {
+        "symbol": symbol,
+        "name": overview.get("Name") or symbol,
+        "exchange": overview.get("Exchange"),
+        "sector": overview.get("Sector"),
+        "industry": overview.get("Industry"),
+        "currency": overview.get("Currency"),
+        "updated_at": datetime.utcnow(),
+    }
+    stmt = pg_insert(CompanyProfile).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CompanyProfile.symbol],
+        set_={k: stmt.excluded[k] for k in values if k != "symbol"},
+    ).returning(CompanyProfile)
+    result = await db.execute(stmt)
+    profile = result.scalar_one()
+
+    await db.execute(
+        update(PortfolioStock)
+        .where(PortfolioStock.symbol == symbol)
+        .values(name=values["name"])
+    )
+    if commit:
+        await db.commit()
+    return profile
+
+
+# Rows per INSERT statement; 10 bind params per row keeps us under asyncpg's 32767 limit
+DAILY_PRICE_UPSERT_CHUNK = 3000
+DAILY_PRICE_VALUE_COLUMNS = (
+    "adjusted_close", "open", "high", "low", "close", "volume", "dividend_amount", "split_coefficient",
+)
+
+async def bulk_upsert_daily_prices(db: AsyncSession, rows: list, commit: bool = True) -> int:
+    """
+    Write a batch of {"symbol", "date", "adjusted_close", ...bar columns} rows
+    with set-based INSERT ... ON CONFLICT (symbol, date) DO UPDATE. Returns
+    rows inserted or changed; unchanged rows are skipped and not counted.
+    """
+    if not rows:
+        return 0
+    written = 0
+    for i in range(0, len(rows), DAILY_PRICE_UPSERT_CHUNK):
+        chunk = rows[i:i + DAILY_PRICE_UPSERT_CHUNK]
+        stmt = pg_insert(StockDailyPrice).values(chunk)
+        columns = [c for c in DAILY_PRICE_VALUE_COLUMNS if c in chunk[0]]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StockDailyPrice.symbol, StockDailyPrice.date],
+            set_={c: stmt.excluded[c] for c in columns},
+            # skip no-op rewrites of unchanged rows (and fill bar columns on rows stored before they existed)
+            where=tuple_(*(getattr(StockDailyPrice, c) for c in columns)).is_distinct_from(
+                tuple_(*(stmt.excluded[c] for c in columns))
+            ),
+        )
+        result = await db.execute(stmt)
+        written += result.rowcount
+    if commit:
+        await db.commit()
+    return written
+
+async def get_ingestion_states(db: AsyncSession, symbols):
+    result = await db.execute(
+        select(SymbolIngestionState).where(SymbolIngestionState.symbol.in_({s.upper() for s in symbols}))
+    )
+    return {state.symbol: state for state in result.scalars().all()}
+
+async def save_ingestion_state(db: AsyncSession, symbol: str, commit: bool = True, **values):
+    stmt = pg_insert(SymbolIngestionState).values(symbol=symbol.upper(), **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SymbolIngestionState.symbol],
+        set_={k: stmt.excluded[k] for k in values},
+    )
+    await db.execute(stmt)
+    if commit:
+        await db.commit()
+
+async def add_ingestion_run(db: AsyncSession, stats: dict) -> None:
+    db.add(IngestionRun(**{c: stats[c] for c in ("symbols", "failed", "deferred", "rows", "seconds", "rows_per_second")}))
+    await db.commit()
+
+async def get_ingestion_run_totals(db: AsyncSession):
+    """(rows written by every recorded run, latest IngestionRun or None)."""
+    total = await db.scalar(select(func.coalesce(func.sum(IngestionRun.rows), 0)))
+    latest = await db.scalar(select(IngestionRun).order_by(IngestionRun.id.desc()).limit(1))
+    return total, latest
+
+async def get_stored_price_ranges(db: AsyncSession, symbols):
+    """(first_date, last_date) actually stored per symbol, in one grouped query."""
+    result = await db.execute(
+        select(StockDailyPrice.symbol, func.min(StockDailyPrice.date), func.max(StockDailyPrice.date))
+        .where(StockDailyPrice.symbol.in_({s.upper() for s in symbols}))
+        .group_by(StockDailyPrice.symbol)
+    )
+    return {symbol: (first, last) for symbol, first, last in result.all()}
+
+async def find_symbols_with_price_gaps(db: AsyncSession, symbols, min_gap_days: int = 7):
+    """
+    Symbols whose stored series has a hole longer than min_gap_days calendar
+    days between consecutive rows (longer than any weekend + market holiday).
+    """
+    prev_date = func.lag(StockDailyPrice.date).over(
+        partition_by=StockDailyPrice.symbol, order_by=StockDailyPrice.date
+    )
+    ordered = (
+        select(StockDailyPrice.symbol, StockDailyPrice.date, prev_date.label("prev_date"))
+        .where(StockDailyPrice.symbol.in_({s.upper() for s in symbols}))
+        .subquery()
+    )
+    result = await db.execute(
+        select(ordered.c.symbol)
+        .where(ordered.c.date - ordered.c.prev_date > min_gap_days)
+        .distinct()
+    )
+    return set(result.scalars().all())
+
+async def get_trading_signals(db: AsyncSession, symbols):
+    result = await db.execute(
+        select(TradingSignal).where(TradingSignal.symbol.in_({s.upper() for s in symbols}))
+    )
+    return {signal.symbol: signal for signal in result.scalars().all()}
+
+async def upsert_trading_signals(db: AsyncSession, rows: list, commit: bool = True) -> int:
+    if not rows:
+        return 0
+    stmt = pg_insert(TradingSignal).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TradingSignal.symbol],
+        set_={k: stmt.excluded[k] for k in rows[0] if k != "symbol"},
+    )
+    await db.execute(stmt)
+    if commit:
+        await db.commit()
+    return len(rows)
+
+async def get_portfolio_nav(db: AsyncSession, user_id: int, start: date = None, end: date = None):
+    stmt = select(PortfolioNavDaily).where(PortfolioNavDaily.user_id == user_id)
+    if start is not None:
+        stmt = stmt.where(PortfolioNavDaily.date >= start)
+    if end is not None:
+        stmt = stmt.where(PortfolioNavDaily.date <= end)
+    result = await db.execute(stmt.order_by(PortfolioNavDaily.date))
+    return result.scalars().all()
+
+async def get_previous_closes(db: AsyncSession, symbols, before_date: date) -> dict:
     """
-    Gets the most recent available adjusted close price for a symbol on or before a given date.
-    This helps handle weekends/holidays if the cron job is daily.
+    Latest stored adjusted close on or before before_date for every symbol. Each
+    requested symbol probes the (symbol, date) index once through a LATERAL
+    LIMIT 1, so the cost doesn't grow with history length. Handles weekends and
+    holidays; symbols with no stored history are absent from the result.
     """
-    return db.query(StockDailyPrice).filter(
-        StockDailyPrice.symbol == symbol,
-        StockDailyPrice.date <= before_date
-    ).order_by(StockDailyPrice.date.desc()).first()
\ No newline at end of file
+    symbols = {s.upper() for s in symbols}
+    if not symbols:
+        return {}
+    requested = select(func.unnest(pg_array(sorted(symbols))).label("symbol")).subquery("requested")
+    latest = (
+        select(StockDailyPrice.adjusted_close)
+        .where(StockDailyPrice.symbol == requested.c.symbol, StockDailyPrice.date <= before_date)
+        .order_by(StockDailyPrice.date.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    result = await db.execute(
+        select(requested.c.symbol, latest.c.adjusted_close).select_from(requested).join(latest, true())
+    )
+    return {symbol: close for symbol, close in result.all()}
@@ -1,7 +1,9 @@
+import os
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_instrumentation import InstrumentedQueuePool, instrument_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -11,7 +13,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 
 Base = declarative_base()
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+# Set DB_ECHO=true to log every statement while debugging; per-request stats come from db_instrumentation
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=os.getenv("DB_ECHO", "false").lower() == "true",
+    poolclass=InstrumentedQueuePool,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+)
+instrument_engine(engine)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -0,0 +1,176 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.metrics import Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+# Warn when one statement shape runs more than this many times in a single request (N+1)
+DB_REPEATED_STATEMENT_THRESHOLD = int(os.getenv("DB_REPEATED_STATEMENT_THRESHOLD", "5"))
+# Requests spending longer than this in the DB are logged even without repeats
+DB_SLOW_REQUEST_MS = float(os.getenv("DB_SLOW_REQUEST_MS", "200"))
+
+# Expanded IN lists and literals vary per call; collapse them so repeats share a shape
+_IN_LIST = re.compile(r"\bIN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    shape = _IN_LIST.sub("IN (...)", statement)
+    shape = _LITERAL.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestDbStats:
+    """DB activity of one request: query count, time, slowest statement, pool wait, repeated shapes."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int = DB_REPEATED_STATEMENT_THRESHOLD) -> list:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "pool_wait_ms": round(self.pool_wait_seconds * 1000, 2),
+            "slowest_ms": round(self.slowest_seconds * 1000, 2),
+            "slowest_statement": _WHITESPACE.sub(" ", self.slowest_statement or "")[:300] or None,
+        }
+
+
+_current: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+# Process-wide totals, including background work outside any request
+totals = {"queries": 0, "db_seconds": 0.0, "pool_wait_seconds": 0.0, "requests": 0, "repeated_statement_warnings": 0}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that times how long each checkout waits for (or opens) a connection."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - started
+            totals["pool_wait_seconds"] += waited
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+
+
+def instrument_engine(engine) -> None:
+    """Attach timing hooks to an (async) engine's cursor executions."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        totals["queries"] += 1
+        totals["db_seconds"] += seconds
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, seconds)
+
+
+def pool_stats(engine) -> dict:
+    pool = getattr(engine, "sync_engine", engine).pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        })
+    return stats
+
+
+def register_db_metrics(engine) -> None:
+    """Publish the process-wide totals and pool occupancy on /metrics."""
+    totals_gauge = registry.register(Gauge("db_totals", "Process-wide DB totals since start", ("kind",)))
+    pool_gauge = registry.register(Gauge("db_pool", "Connection pool occupancy", ("state",)))
+
+    def collect():
+        for kind, value in totals.items():
+            totals_gauge.set(kind, value=value)
+        for state, value in pool_stats(engine).items():
+            if state != "pool_class":
+                pool_gauge.set(state, value=value)
+    registry.add_collector(collect)
+
+
+class DbInstrumentationMiddleware:
+    """
+    ASGI middleware collecting RequestDbStats for each HTTP request. Adds a
+    Server-Timing header and logs requests with repeated statement shapes
+    (likely N+1 loops) or high DB time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and stats.queries:
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f"db;dur={stats.db_seconds * 1000:.1f};desc=\"{stats.queries} queries\"".encode(),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            totals["requests"] += 1
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: RequestDbStats) -> None:
+        route = f"{scope.get('method')} {scope.get('path')}"
+        repeated = stats.repeated()
+        if repeated:
+            totals["repeated_statement_warnings"] += 1
+            for shape, count in repeated:
+                logger.warning(
+                    "%s ran the same statement %d times (possible N+1): %s", route, count, shape[:300],
+                    extra={"route": route, "repeats": count},
+                )
+        if repeated or stats.db_seconds * 1000 > DB_SLOW_REQUEST_MS:
+            logger.info("DB stats for %s", route, extra={"route": route, **stats.summary()})
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from datetime import timezone
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Seconds; covers cached reads (~1ms) up to slow upstream calls and backtests
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, *labels, value: float) -> None:
+        # For totals kept outside this process (e.g. in the database) and mirrored at scrape time
+        self.values[labels] = value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Gauge:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self.values: Dict[tuple, float] = {}
+
+    def set(self, *labels, value: float) -> None:
+        self.values[labels] = value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and three increments."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, *labels, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.label_names + ("le",)
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+        # Called right before rendering to refresh gauges derived from other state (cache stats, pool)
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"),
+))
+upstream_request_duration = registry.register(Histogram(
+    "alpha_vantage_request_duration_seconds", "Alpha Vantage request latency by API function", ("function",),
+))
+upstream_errors = registry.register(Counter(
+    "alpha_vantage_errors_total", "Failed Alpha Vantage requests by API function and error kind", ("function", "kind"),
+))
+cache_hits = registry.register(Gauge("cache_hits", "Cache hits since start", ("cache",)))
+cache_misses = registry.register(Gauge("cache_misses", "Cache misses since start", ("cache",)))
+cache_hit_ratio = registry.register(Gauge("cache_hit_ratio", "Cache hits / lookups since start", ("cache",)))
+# Ingestion runs in scripts/fetch_daily_prices.py, so these mirror the ingestion_runs table
+ingestion_rows = registry.register(Counter("ingestion_rows_total", "Daily price rows written by recorded ingestion runs"))
+ingestion_rows_per_second = registry.register(Gauge(
+    "ingestion_rows_per_second", "Rows per second of the latest recorded ingestion run",
+))
+ingestion_last_run = registry.register(Gauge(
+    "ingestion_last_run_timestamp_seconds", "Unix time the latest recorded ingestion run finished",
+))
+event_loop_lag = registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay of a periodic event-loop tick beyond its scheduled time",
+))
+event_loop_lag_last = registry.register(Gauge("event_loop_lag_last_seconds", "Most recent event-loop lag sample"))
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose a QuoteCache-style object (hits/misses counters) under the given cache label."""
+    def collect():
+        lookups = cache.hits + cache.misses
+        cache_hits.set(name, value=cache.hits)
+        cache_misses.set(name, value=cache.misses)
+        cache_hit_ratio.set(name, value=cache.hits / lookups if lookups else 0.0)
+    registry.add_collector(collect)
+
+
+def set_ingestion_metrics(total_rows: int, latest_run) -> None:
+    """Mirror the recorded ingestion runs (total rows, latest IngestionRun or None)."""
+    ingestion_rows.set(value=total_rows)
+    if latest_run is not None:
+        ingestion_rows_per_second.set(value=latest_run.rows_per_second)
+        ingestion_last_run.set(value=latest_run.finished_at.replace(tzinfo=timezone.utc).timestamp())
+
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL_SECONDS) -> None:
+    """Sleep-and-measure loop: any extra delay is time the loop spent blocked on other work."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        event_loop_lag.observe(value=lag)
+        event_loop_lag_last.set(value=lag)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request into http_request_duration_seconds."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template, not raw path, to keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_duration.observe(
+                scope["method"], route, f"{status[0] // 100}xx", value=time.perf_counter() - started,
+            )
@@ -0,0 +1,93 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import bcrypt
+
+# Cost factor for new hashes; stored hashes with a different cost are re-hashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so these threads hash in parallel without blocking the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes running or queued at once; beyond this, callers wait up to the queue timeout and then get a 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "5"))
+# bcrypt only uses the first 72 bytes; passlib truncated silently, bcrypt>=5 raises instead
+BCRYPT_MAX_BYTES = 72
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: Optional[asyncio.Semaphore] = None
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue stays full for longer than the queue timeout."""
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def shutdown_password_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _secret(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(_secret(password), bcrypt.gensalt(rounds)).decode("ascii")
+
+
+def verify_password_sync(password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(_secret(password), hashed_password.encode("ascii"))
+    except ValueError:
+        # malformed or non-bcrypt stored hash
+        return False
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor of a "$2b$12$..." hash, or None if it isn't a bcrypt hash."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    return hash_rounds(hashed_password) != BCRYPT_ROUNDS
+
+
+async def _run(fn, *args):
+    global _pending
+    if _pending is None:
+        _pending = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+    try:
+        await asyncio.wait_for(_pending.acquire(), PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise PasswordHasherBusy("Too many concurrent sign-ins, try again shortly")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_password_executor(), fn, *args)
+    finally:
+        _pending.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run(hash_password_sync, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password off the event loop. Returns (valid, new_hash); new_hash is
+    set when the stored hash used another cost factor and should be replaced.
+    """
+    valid = await _run(verify_password_sync, password, hashed_password)
+    if valid and needs_rehash(hashed_password):
+        return True, await hash_password(password)
+    return valid, None
@@ -1,3 +1,11 @@
 from .user import User
 from .portfoliostock import PortfolioStock
-from .stock import Stock
\ No newline at end of file
+from .stock import Stock
+from .companyprofile import CompanyProfile
+from .dailyprice import StockDailyPrice
+from .ingestionstate import SymbolIngestionState
+from .backtestresult import BacktestResultRecord
+from .indicatorstate import IndicatorState
+from .tradingsignal import TradingSignal
+from .portfolionav import PortfolioNavDaily
+from .ingestionrun import IngestionRun
\ No newline at end of file
@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, DateTime, Integer, String
+from app.core.database import Base
+
+class BacktestResultRecord(Base):
+    __tablename__ = "backtest_results"
+
+    # sha256 of kind + parameters + symbols + date range + price data version
+    cache_key = Column(String(64), primary_key=True)
+    kind = Column(String, nullable=False)
+    request = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=False)
+    duration_ms = Column(Integer)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, String
+from app.core.database import Base
+
+class CompanyProfile(Base):
+    __tablename__ = "company_profiles"
+
+    # Slow-changing OVERVIEW metadata, one row per symbol
+    symbol = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    exchange = Column(String)
+    sector = Column(String)
+    industry = Column(String)
+    currency = Column(String)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
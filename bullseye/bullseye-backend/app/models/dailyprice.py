@@ -1,21 +1,32 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, UniqueConstraint
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
-from datetime import date
-
-Base = declarative_base()
+from sqlalchemy import BigInteger, Column, Date, Float, Index, PrimaryKeyConstraint, REAL, String
+from app.core.database import Base
 
 class StockDailyPrice(Base):
     __tablename__ = "stock_daily_prices"
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, index=True, nullable=False)
-    date = Column(Date, index=True, nullable=False)
+    symbol = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
     adjusted_close = Column(Float, nullable=False)
+    # Raw bars from TIME_SERIES_DAILY_ADJUSTED; NULL for rows stored before these columns existed.
+    # Prices stay double precision: REAL would cut the heap by ~16%, but its 24-bit mantissa
+    # cannot hold Alpha Vantage's 4 decimals above $1,000 (or whole cents above $131,072)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(BigInteger)
+    # Single precision is plenty for per-share dividends and split ratios
+    dividend_amount = Column(REAL)
+    split_coefficient = Column(REAL)
 
     __table_args__ = (
-        # Ensure only one price entry per stock per day
-        UniqueConstraint('symbol', 'date', name='_symbol_date_uc'),
+        # One B-tree serves the ON CONFLICT upsert and every per-symbol range read; carrying
+        # adjusted_close in the index lets the analytics reads run as index-only scans
+        PrimaryKeyConstraint("symbol", "date", postgresql_include=["adjusted_close"]),
+        # "Every symbol since <date>" scans such as the NAV materialization. A B-tree, not BRIN:
+        # a symbol's first full fetch writes its whole history at once, so the heap is not
+        # in date order (BRIN measured 0.4 ms -> 11.8 ms on benchmarks/daily_prices_storage.py)
+        Index("ix_stock_daily_prices_date", "date"),
     )
 
     def __repr__(self):
-        return f"<StockDailyPrice(symbol='{self.symbol}', date='{self.date}', adjusted_close={self.adjusted_close})>"
\ No newline at end of file
+        return f"<StockDailyPrice(symbol='{self.symbol}', date='{self.date}', adjusted_close={self.adjusted_close})>"
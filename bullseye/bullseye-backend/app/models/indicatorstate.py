@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, Date, DateTime, String
+from app.core.database import Base
+
+class IndicatorState(Base):
+    __tablename__ = "indicator_state"
+
+    symbol = Column(String, primary_key=True)
+    # last bar folded into the streaming state
+    last_date = Column(Date, nullable=False)
+    state = Column(JSON, nullable=False)
+    # latest value of every indicator, keyed by name (e.g. "rsi_14")
+    latest = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Integer
+from app.core.database import Base
+
+class IngestionRun(Base):
+    __tablename__ = "ingestion_runs"
+
+    # One row per ingest_symbols run; ingestion runs in scripts, so /metrics reads its stats from here
+    id = Column(Integer, primary_key=True)
+    finished_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    symbols = Column(Integer, nullable=False)
+    failed = Column(Integer, nullable=False)
+    deferred = Column(Integer, nullable=False)
+    rows = Column(Integer, nullable=False)
+    seconds = Column(Float, nullable=False)
+    rows_per_second = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<IngestionRun(finished_at='{self.finished_at}', rows={self.rows})>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Boolean, Column, Date, DateTime, String
+from app.core.database import Base
+
+class SymbolIngestionState(Base):
+    __tablename__ = "symbol_ingestion_state"
+
+    # Per-symbol watermark for stock_daily_prices ingestion
+    symbol = Column(String, primary_key=True)
+    first_stored_date = Column(Date)
+    last_stored_date = Column(Date)
+    last_attempt_at = Column(DateTime)
+    last_success_at = Column(DateTime)
+    last_error = Column(String)
+    last_full_fetch_at = Column(DateTime)
+    # Holes are known in the stored series: set when the planner finds them before the backfill
+    # retry window has passed, or when a backfill fetch fails; cleared by a successful full fetch
+    needs_backfill = Column(Boolean, nullable=False, default=False)
+
+    def __repr__(self):
+        return f"<SymbolIngestionState(symbol='{self.symbol}', last_stored_date='{self.last_stored_date}')>"
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer
+from app.core.database import Base
+
+class PortfolioNavDaily(Base):
+    __tablename__ = "portfolio_nav_daily"
+
+    # (user_id, date) primary key, so a user's history is one index range scan
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    stock_value = Column(Float, nullable=False)
+    cash = Column(Float, nullable=False)
+    nav = Column(Float, nullable=False)
@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String
+from app.core.database import Base
+
+class TradingSignal(Base):
+    __tablename__ = "trading_signals"
+
+    symbol = Column(String, primary_key=True)
+    as_of = Column(Date, nullable=False)
+    close = Column(Float, nullable=False)
+    short_window = Column(Integer, nullable=False)
+    long_window = Column(Integer, nullable=False)
+    sma_short = Column(Float, nullable=False)
+    sma_long = Column(Float, nullable=False)
+    # "bullish" while the short SMA is above the long SMA, else "bearish"
+    state = Column(String, nullable=False)
+    # BUY/SELL right after a cross, HOLD otherwise
+    signal = Column(String, nullable=False)
+    # NULL if the SMAs haven't crossed within the stored history
+    bars_since_cross = Column(Integer)
+    # SMA spread as a percent of the long SMA; sign follows the state
+    strength = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,66 @@
+from datetime import date
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+from app.schemas.symbol import Symbol
+
+class BacktestRequest(BaseModel):
+    symbol: Symbol
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    initial_capital: float = Field(10000.0, gt=0)
+    short_window: int = Field(20, ge=1)
+    long_window: int = Field(50, ge=2)
+    commission: float = Field(0.0, ge=0)  # fraction of traded notional, e.g. 0.001 = 10 bps
+
+class PerformancePoint(BaseModel):
+    date: str
+    value: float
+    drawdown: float
+
+class MonthlyReturn(BaseModel):
+    month: str
+    # "return" is a keyword, so the field is aliased to match what the Backtest page renders
+    return_: float = Field(..., alias="return")
+
+    class Config:
+        validate_by_name = True
+
+# Field names match what src/pages/Backtest.tsx renders
+class BacktestResult(BaseModel):
+    symbol: Optional[str] = None
+    totalReturn: float
+    sharpeRatio: float
+    maxDrawdown: float
+    winRate: float
+    totalTrades: int
+    profitFactor: float
+    performanceData: List[PerformancePoint]
+    monthlyReturns: List[MonthlyReturn]
+
+class WindowRange(BaseModel):
+    start: int = Field(..., ge=1)
+    stop: int = Field(..., ge=1)  # inclusive
+    step: int = Field(1, ge=1)
+
+class SweepRequest(BaseModel):
+    symbols: List[Symbol] = Field(..., min_length=1, max_length=50)
+    short_windows: WindowRange
+    long_windows: WindowRange
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    commission: float = Field(0.0, ge=0)
+    metric: Literal["sharpe", "return"] = "sharpe"
+    top_n: int = Field(20, ge=1, le=500)
+
+class PortfolioBacktestRequest(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    short_window: int = Field(20, ge=1)
+    long_window: int = Field(50, ge=2)
+    commission: float = Field(0.0, ge=0)
+    rebalance_every: int = Field(21, ge=1)  # bars between scheduled rebalances
+
+class PortfolioBacktestResult(BacktestResult):
+    symbols: List[str]
+    initialCapital: float
+    finalWeights: Dict[str, float]
@@ -1,8 +1,12 @@
+from datetime import date
+from typing import Optional
 from pydantic import BaseModel
+from app.schemas.symbol import Symbol
 
 class StockCreate(BaseModel):
-    symbol: str
-    name: str
+    symbol: Symbol
+    # Ignored: the name is filled from company_profiles. Kept so older clients still validate.
+    name: Optional[str] = None
     shares: int
 
 class StockOut(BaseModel):
@@ -13,7 +17,7 @@ class StockOut(BaseModel):
     purchase_price: float
 
 class StockUpdate(BaseModel):
-    symbol: str
+    symbol: Symbol
     shares: int
     price: float
 
@@ -24,3 +28,11 @@ class PortfolioSummary(BaseModel):
 
     class Config:
         orm_mode = True
+
+class NavPoint(BaseModel):
+    date: date
+    stock_value: float
+    cash: float
+    nav: float
+    # fraction below the running peak NAV within the requested range (0 at a new high)
+    drawdown: float
@@ -0,0 +1,19 @@
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel
+
+class TradingSignalOut(BaseModel):
+    symbol: str
+    as_of: date
+    close: float
+    short_window: int
+    long_window: int
+    sma_short: float
+    sma_long: float
+    state: str
+    signal: str
+    bars_since_cross: Optional[int]
+    strength: float
+
+    class Config:
+        orm_mode = True
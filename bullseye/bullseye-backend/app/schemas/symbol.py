@@ -0,0 +1,19 @@
+import re
+from typing import Annotated
+from pydantic import AfterValidator
+
+# Ticker characters only (BRK.B, RDS-A). Symbols also name files in the price cache,
+# so anything that could form a path (separators, arbitrary length) is rejected.
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-]{1,10}$")
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Upper-cased symbol, or ValueError if it isn't a plausible ticker."""
+    normalized = symbol.strip().upper()
+    if not SYMBOL_PATTERN.fullmatch(normalized):
+        raise ValueError(f"Invalid symbol {symbol!r}")
+    return normalized
+
+
+# Request fields and path parameters: validated and upper-cased, 422 otherwise
+Symbol = Annotated[str, AfterValidator(normalize_symbol)]
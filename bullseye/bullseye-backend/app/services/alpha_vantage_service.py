@@ -1,24 +1,334 @@
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+from collections import OrderedDict
+import asyncio
+import logging
 import os
+import time
 from dotenv import load_dotenv
 import httpx
+from app.core.metrics import register_cache, upstream_errors, upstream_request_duration
+from app.services.rate_scheduler import BudgetExhausted, Priority, UpstreamScheduler
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
+BASE_URL = os.getenv("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+
+# Shared HTTP client pool / retry settings
+HTTP_MAX_CONNECTIONS = int(os.getenv("ALPHA_VANTAGE_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ALPHA_VANTAGE_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("ALPHA_VANTAGE_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("ALPHA_VANTAGE_TIMEOUT_SECONDS", "10"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("ALPHA_VANTAGE_CONNECT_TIMEOUT_SECONDS", "3"))
+HTTP_MAX_RETRIES = int(os.getenv("ALPHA_VANTAGE_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF_SECONDS = float(os.getenv("ALPHA_VANTAGE_RETRY_BACKOFF_SECONDS", "0.5"))
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# How long a GLOBAL_QUOTE stays fresh, and how many symbols we keep around
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "15"))
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "2048"))
+
+# Fan-out limits for batch lookups (e.g. valuing a whole portfolio); the concurrency cap is
+# shared by every batch on the service, not granted per call
+BATCH_CONCURRENCY = int(os.getenv("ALPHA_VANTAGE_BATCH_CONCURRENCY", "8"))
+BATCH_SYMBOL_TIMEOUT_SECONDS = float(os.getenv("ALPHA_VANTAGE_SYMBOL_TIMEOUT_SECONDS", "5"))
+
+
+class QuoteCache:
+    """
+    Process-wide TTL cache for quotes with single-flight on misses.
+    Concurrent misses for the same key share one upstream call. Expired
+    entries are kept (until evicted) as the last known value.
+    """
+
+    def __init__(self, ttl: float = QUOTE_CACHE_TTL_SECONDS, max_entries: int = QUOTE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: str) -> Optional[tuple]:
+        """Last known value regardless of TTL, as (value, age_seconds)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        return value, time.monotonic() - stored_at
+
+    def is_inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def stored_at(self, key: str) -> Optional[float]:
+        """Monotonic time a still-fresh entry was stored; None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return None
+        return entry[0]
+
+    def ttl_remaining(self, key: str) -> float:
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(0.0, self.ttl - (time.monotonic() - entry[0]))
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return await self.refresh(key, fetch)
+
+    async def refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch a fresh value, joining an in-flight fetch for the same key if there is one."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_fetched(key, t))
+        else:
+            self.coalesced += 1
+
+        # shield so one cancelled waiter does not cancel the shared upstream call
+        return await asyncio.shield(task)
+
+    def _on_fetched(self, key: str, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        # Failed lookups come back as None and are never cached
+        if task.result() is not None:
+            self.set(key, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+
+def create_http_client(
+    max_connections: int = HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    timeout: float = HTTP_TIMEOUT_SECONDS,
+) -> httpx.AsyncClient:
+    """
+    Build the long-lived, keep-alive client used for all upstream market data.
+    The app creates one in its lifespan; scripts create their own.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        # connection-level retries; status-level retries happen in AlphaVantageService._get
+        transport=httpx.AsyncHTTPTransport(retries=1),
+    )
+
+
+# Shared by every AlphaVantageService instance in this process
+quote_cache = QuoteCache()
+upstream_scheduler = UpstreamScheduler()
+overview_cache = QuoteCache(ttl=24 * 60 * 60, max_entries=QUOTE_CACHE_MAX_ENTRIES)
+register_cache("quote", quote_cache)
+register_cache("overview", overview_cache)
+
 
 class AlphaVantageService:
-    base_url = "https://www.alphavantage.co/query"
+    base_url = BASE_URL
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
+        cache: Optional[QuoteCache] = None,
+        scheduler: Optional[UpstreamScheduler] = None,
+        max_retries: int = HTTP_MAX_RETRIES,
+        retry_backoff: float = HTTP_RETRY_BACKOFF_SECONDS,
+        batch_concurrency: int = BATCH_CONCURRENCY,
+    ):
+        self._owns_client = client is None
+        self.client = client or create_http_client()
+        if base_url:
+            self.base_url = base_url
+        self.quote_cache = cache or quote_cache
+        self.overview_cache = overview_cache
+        self.scheduler = scheduler or upstream_scheduler
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._batch_slots = asyncio.Semaphore(max(1, batch_concurrency))
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def _get(self, params: Dict[str, Any], priority: Priority = Priority.INTERACTIVE, budgeted: bool = True) -> Dict[str, Any]:
+        """
+        GET against the API with exponential backoff on transport errors and 429/5xx.
+        Every attempt spends one slot from the shared rate budget; pass
+        budgeted=False when the caller already holds a slot.
+        """
+        function = params.get("function", "unknown")
+        attempt = 0
+        while True:
+            if budgeted or attempt > 0:
+                await self.scheduler.acquire(priority)
+            started = time.perf_counter()
+            try:
+                response = await self.client.get(self.base_url, params=params)
+                upstream_request_duration.observe(function, value=time.perf_counter() - started)
+                if response.status_code >= 400:
+                    upstream_errors.inc(function, f"http_{response.status_code}")
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    data = response.json()
+                    # Quota hits come back as HTTP 200 with a "Note"/"Information" message
+                    if isinstance(data, dict) and set(data) & {"Note", "Information"} and len(data) == 1:
+                        upstream_errors.inc(function, "quota")
+                        self.scheduler.mark_exhausted()
+                        raise BudgetExhausted(next(iter(data.values())))
+                    return data
+            except httpx.TransportError:
+                upstream_errors.inc(function, "transport")
+                if attempt >= self.max_retries:
+                    raise
+            await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+            attempt += 1
 
     async def get_stock_quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        """
+        Cached quote for a symbol. When the rate budget is exhausted the last
+        known quote is returned with stale=True; BudgetExhausted is raised only
+        if we have never seen the symbol.
+        """
+        symbol = symbol.upper()
+        try:
+            return await self.quote_cache.get_or_fetch(symbol, lambda: self._fetch_stock_quote(symbol))
+        except BudgetExhausted:
+            last_known = self.quote_cache.get_stale(symbol)
+            if last_known is None:
+                raise BudgetExhausted(f"Rate budget exhausted and no last known quote for {symbol}")
+            quote, age = last_known
+            return {**quote, "stale": True, "budget_exhausted": True, "age_seconds": round(age, 1)}
+
+    async def get_stock_price(self, symbol: str) -> Dict[str, float]:
+        quote = await self.get_stock_quote(symbol)
+        if quote is None:
+            raise ValueError(f"Could not fetch quote for {symbol.upper()}")
+        return quote
+
+    async def warm_stock_quote(self, symbol: str) -> bool:
+        """
+        Refresh a quote in the background using idle budget only.
+        Returns False without calling upstream if there is no spare budget.
+        """
+        symbol = symbol.upper()
+        if self.quote_cache.is_inflight(symbol) or not self.scheduler.try_acquire_idle():
+            return False
+        await self.quote_cache.refresh(
+            symbol, lambda: self._fetch_stock_quote(symbol, priority=Priority.WARMING, budgeted=False)
+        )
+        return True
+
+    async def get_stock_prices(
+        self,
+        symbols: Iterable[str],
+        timeout: float = BATCH_SYMBOL_TIMEOUT_SECONDS,
+    ) -> Dict[str, Union[Dict[str, float], Exception]]:
+        """
+        Quote many symbols concurrently. Each symbol gets its own timeout and
+        its failure is returned in place of the quote instead of raised.
+        """
+        return await self._gather_per_symbol(self.get_stock_price, symbols, timeout, self.quote_cache)
+
+    async def get_company_overviews(
+        self,
+        symbols: Iterable[str],
+        timeout: float = BATCH_SYMBOL_TIMEOUT_SECONDS,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        return await self._gather_per_symbol(
+            lambda symbol: self.get_company_overview(symbol, priority=priority), symbols, timeout, self.overview_cache
+        )
+
+    async def _gather_per_symbol(self, fetch, symbols, timeout, cache: QuoteCache):
+        unique_symbols = list(dict.fromkeys(s.upper() for s in symbols))
+
+        async def run(symbol):
+            # Fresh cache hits cost nothing upstream, so they don't queue behind other batches' misses
+            if cache.get(symbol) is not None:
+                return await fetch(symbol)
+            async with self._batch_slots:
+                try:
+                    return await asyncio.wait_for(fetch(symbol), timeout)
+                except asyncio.TimeoutError:
+                    return TimeoutError(f"Timed out fetching {symbol} after {timeout}s")
+                except Exception as e:
+                    return e
+
+        results = await asyncio.gather(*(run(symbol) for symbol in unique_symbols))
+        return dict(zip(unique_symbols, results))
+
+    async def get_company_overview(self, symbol: str, priority: Priority = Priority.INTERACTIVE) -> Optional[Dict[str, Any]]:
+        symbol = symbol.upper()
+        return await self.overview_cache.get_or_fetch(symbol, lambda: self._fetch_company_overview(symbol, priority))
+
+    async def _fetch_company_overview(self, symbol: str, priority: Priority = Priority.INTERACTIVE) -> Optional[Dict[str, Any]]:
+        params = {
+            "function": "OVERVIEW",
+            "symbol": symbol,
+            "apikey": API_KEY,
+        }
+        data = await self._get(params, priority=priority)
+
+        if not data or "Symbol" not in data:
+            logger.warning("Could not fetch OVERVIEW for %s: %s", symbol, data)
+            return None
+        return data
+
+    async def _fetch_stock_quote(self, symbol: str, priority: Priority = Priority.INTERACTIVE, budgeted: bool = True) -> Optional[Dict[str, float]]:
         params = {
             "function": "GLOBAL_QUOTE",
             "symbol": symbol,
             "apikey": API_KEY,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.base_url, params=params)
-            data = await response.json()
+        data = await self._get(params, priority=priority, budgeted=budgeted)
 
         try:
             quote = data["Global Quote"]
@@ -28,28 +338,28 @@ class AlphaVantageService:
                 "percent_change": float(quote["10. change percent"].replace("%", "")),
             }
         except KeyError:
-            print(f"Could not fetch GLOBAL_QUOTE for {symbol}: {data}")
+            logger.warning("Could not fetch GLOBAL_QUOTE for %s: %s", symbol, data)
             return None
 
-    async def get_daily_adjusted_time_series(self, symbol: str, outputsize: str = "compact") -> Optional[Dict[str, Any]]:
+    async def get_daily_adjusted_time_series(
+        self, symbol: str, outputsize: str = "compact", priority: Priority = Priority.INGESTION
+    ) -> Optional[Dict[str, Any]]:
         params = {
             "function": "TIME_SERIES_DAILY_ADJUSTED",
             "symbol": symbol,
             "apikey": API_KEY,
             "outputsize": outputsize
         }
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                data = await response.json()
-                if "Time Series (Daily)" in data:
-                    return data["Time Series (Daily)"]
-                elif "Error Message" in data:
-                    print(f"API Error for {symbol}: {data['Error Message']}")
-                    return {"error": data["Error Message"]}
-            except Exception as e:
-                print(f"Error fetching adjusted series for {symbol}: {e}")
-            return None
-
-    
\ No newline at end of file
+        try:
+            data = await self._get(params, priority=priority)
+            if "Time Series (Daily)" in data:
+                return data["Time Series (Daily)"]
+            elif "Error Message" in data:
+                logger.warning("API error for %s: %s", symbol, data["Error Message"])
+                return {"error": data["Error Message"]}
+        except BudgetExhausted as e:
+            logger.warning("Rate budget exhausted fetching adjusted series for %s: %s", symbol, e)
+            return {"error": str(e), "budget_exhausted": True}
+        except Exception as e:
+            logger.error("Error fetching adjusted series for %s: %s", symbol, e)
+        return None
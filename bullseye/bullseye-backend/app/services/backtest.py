@@ -0,0 +1,121 @@
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+# Reported when there are winning trades but no losing ones (JSON has no infinity)
+PROFIT_FACTOR_CAP = 999.0
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def rolling_mean(closes: np.ndarray, window: int, cumsum: np.ndarray = None) -> np.ndarray:
+    """
+    Simple moving average from a cumulative sum, NaN until the window fills.
+    Pass a precomputed cumsum (with a leading 0) to share it across windows.
+    """
+    if cumsum is None:
+        cumsum = np.concatenate(([0.0], np.cumsum(closes, dtype=np.float64)))
+    out = np.full(len(closes), np.nan)
+    if window <= len(closes):
+        out[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return out
+
+
+def crossover_positions(short_sma: np.ndarray, long_sma: np.ndarray) -> np.ndarray:
+    """
+    1.0 while the short SMA is above the long SMA, else 0.0, shifted one bar
+    so today's signal is traded on tomorrow's return (no look-ahead).
+    """
+    signal = np.where(np.isnan(long_sma), 0.0, (short_sma > long_sma).astype(np.float64))
+    positions = np.empty_like(signal)
+    positions[0] = 0.0
+    positions[1:] = signal[:-1]
+    return positions
+
+
+def strategy_returns(closes: np.ndarray, positions: np.ndarray, commission: float = 0.0) -> np.ndarray:
+    """Per-bar strategy returns (first bar is 0) after commission on position changes."""
+    asset_returns = np.zeros(len(closes))
+    asset_returns[1:] = closes[1:] / closes[:-1] - 1.0
+    returns = positions * asset_returns
+    if commission:
+        turnover = np.abs(np.diff(positions, prepend=0.0))
+        returns -= turnover * commission
+    return returns
+
+
+def trade_returns(equity: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Return of each round trip: equity after the exit bar (including its
+    commission) over equity before the entry bar. Open trades close on the last bar.
+    """
+    changes = np.diff(positions, prepend=0.0)
+    entries = np.flatnonzero(changes > 0)
+    exits = np.flatnonzero(changes < 0)
+    if len(exits) < len(entries):
+        exits = np.append(exits, len(equity) - 1)
+    # positions[0] is always flat, so every entry index is >= 1
+    return equity[exits] / equity[entries - 1] - 1.0
+
+
+def summarize(dates: np.ndarray, equity: np.ndarray, returns: np.ndarray, trades: np.ndarray, initial_capital: float) -> dict:
+    """Metrics in the shape the Backtest page renders."""
+    running_max = np.maximum.accumulate(equity)
+    drawdown = equity / running_max - 1.0
+
+    std = returns[1:].std()
+    sharpe = returns[1:].mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR) if std > 0 else 0.0
+
+    gains = trades[trades > 0].sum()
+    losses = -trades[trades < 0].sum()
+    if losses > 0:
+        profit_factor = gains / losses
+    else:
+        profit_factor = PROFIT_FACTOR_CAP if gains > 0 else 0.0
+
+    # Month-end samples of the equity/drawdown curve and month-over-month returns
+    months = dates.astype("datetime64[M]")
+    month_ends = np.flatnonzero(np.append(months[1:] != months[:-1], True))
+    month_equity = equity[month_ends]
+    previous = np.concatenate(([initial_capital], month_equity[:-1]))
+    month_returns = month_equity / previous - 1.0
+
+    performance = [
+        {"date": str(months[i]), "value": round(float(equity[i]), 2), "drawdown": round(float(drawdown[i] * 100), 2)}
+        for i in month_ends
+    ]
+    monthly = [
+        {"month": f"{MONTH_NAMES[int(str(months[i])[5:7]) - 1]} {str(months[i])[:4]}", "return": round(float(r * 100), 2)}
+        for i, r in zip(month_ends, month_returns)
+    ]
+
+    return {
+        "totalReturn": round(float((equity[-1] / initial_capital - 1.0) * 100), 2),
+        "sharpeRatio": round(float(sharpe), 2),
+        "maxDrawdown": round(float(drawdown.min() * 100), 2),
+        "winRate": round(float((trades > 0).mean() * 100), 2) if len(trades) else 0.0,
+        "totalTrades": int(len(trades)),
+        "profitFactor": round(float(profit_factor), 2),
+        "performanceData": performance,
+        "monthlyReturns": monthly,
+    }
+
+
+def run_sma_crossover(
+    dates: np.ndarray,
+    closes: np.ndarray,
+    short_window: int,
+    long_window: int,
+    initial_capital: float = 10000.0,
+    commission: float = 0.0,
+) -> dict:
+    """Long/flat SMA crossover backtest over a single price series, fully vectorized."""
+    if short_window >= long_window:
+        raise ValueError("short_window must be smaller than long_window")
+    if len(closes) <= long_window:
+        raise ValueError(f"Need more than {long_window} bars, got {len(closes)}")
+
+    closes = np.asarray(closes, dtype=np.float64)
+    cumsum = np.concatenate(([0.0], np.cumsum(closes)))
+    positions = crossover_positions(rolling_mean(closes, short_window, cumsum), rolling_mean(closes, long_window, cumsum))
+    returns = strategy_returns(closes, positions, commission)
+    equity = initial_capital * np.cumprod(1.0 + returns)
+    return summarize(dates, equity, returns, trade_returns(equity, positions), initial_capital)
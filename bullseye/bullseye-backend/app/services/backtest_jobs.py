@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.database import async_session
+from app.models.backtestresult import BacktestResultRecord
+from app.services.backtest import run_sma_crossover
+from app.services.portfolio_backtest import build_price_matrix, run_portfolio_crossover
+from app.services.price_cache import PriceCache, price_cache, sync_symbol
+from app.services.sweep import get_sweep_executor, run_sweep
+
+logger = logging.getLogger(__name__)
+
+# Jobs allowed to run at once; the rest wait in "queued"
+BACKTEST_JOB_WORKERS = int(os.getenv("BACKTEST_JOB_WORKERS", "2"))
+# Finished jobs kept in memory for status polling (results also live in backtest_results)
+MAX_TRACKED_JOBS = int(os.getenv("BACKTEST_MAX_TRACKED_JOBS", "500"))
+
+
+# --- process-pool entry points: load prices from the memmapped cache inside the worker ---
+
+def run_cached_backtest(cache_root: str, params: dict) -> dict:
+    series = PriceCache(cache_root).load(params["symbol"], _as_date(params["start_date"]), _as_date(params["end_date"]))
+    if series is None or len(series[0]) == 0:
+        raise ValueError(f"No price history stored for {params['symbol']}")
+    return {"symbol": params["symbol"], **run_sma_crossover(
+        series[0], series[1],
+        short_window=params["short_window"],
+        long_window=params["long_window"],
+        initial_capital=params["initial_capital"],
+        commission=params["commission"],
+    )}
+
+
+def run_cached_portfolio_backtest(cache_root: str, params: dict) -> dict:
+    symbols = sorted(params["holdings"])
+    calendar, prices = build_price_matrix(
+        PriceCache(cache_root), symbols, _as_date(params["start_date"]), _as_date(params["end_date"])
+    )
+    return {"symbols": symbols, **run_portfolio_crossover(
+        symbols, calendar, prices,
+        initial_shares=np.array([params["holdings"][s] for s in symbols], dtype=np.float64),
+        initial_cash=params["cash"],
+        short_window=params["short_window"],
+        long_window=params["long_window"],
+        commission=params["commission"],
+        rebalance_every=params["rebalance_every"],
+    )}
+
+
+def _as_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def _window_range(r: dict) -> np.ndarray:
+    return np.arange(r["start"], r["stop"] + 1, r["step"])
+
+
+class BacktestJob:
+    def __init__(self, job_id: str, kind: str, params: dict):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self._listeners: List[asyncio.Queue] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def snapshot(self, include_result: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "cached": self.cached,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_result and self.status == "done":
+            data["result"] = self.result
+        return data
+
+    def publish(self) -> None:
+        for queue in self._listeners:
+            # only the latest state matters: drop an unread update instead of blocking
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(self.snapshot(include_result=self.finished))
+
+    async def events(self):
+        """Yield job snapshots as they change, ending with the finished state."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._listeners.append(queue)
+        try:
+            yield self.snapshot(include_result=self.finished)
+            while not self.finished:
+                snapshot = await queue.get()
+                yield snapshot
+                if snapshot["status"] in ("done", "failed"):
+                    break
+        finally:
+            self._listeners.remove(queue)
+
+
+class BacktestJobManager:
+    """
+    Runs backtests and sweeps in the analytics process pool, at most
+    `workers` at a time. Jobs are keyed by a hash of their inputs and the
+    price data version. Identical submissions attach to the running job or
+    are answered from backtest_results.
+    """
+
+    def __init__(self, workers: int = BACKTEST_JOB_WORKERS):
+        self._slots = asyncio.Semaphore(max(1, workers))
+        self._jobs: "OrderedDict[str, BacktestJob]" = OrderedDict()
+        # Submissions still syncing prices or checking backtest_results, keyed by their
+        # inputs alone (the job id also needs the price version, known only after the sync)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._tasks = set()
+
+    def get(self, job_id: str) -> Optional[BacktestJob]:
+        return self._jobs.get(job_id)
+
+    def cache_key(self, kind: str, params: dict, symbols: List[str]) -> str:
+        versions = {symbol: price_cache.version(symbol) for symbol in sorted(symbols)}
+        payload = json.dumps({"kind": kind, "params": params, "data_version": versions}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def submit(self, db, kind: str, params: dict, symbols: List[str]) -> BacktestJob:
+        # Register before the first await so an identical concurrent request waits for this
+        # one instead of running the job a second time
+        request_key = json.dumps({"kind": kind, "params": params, "symbols": sorted(symbols)}, sort_keys=True, default=str)
+        pending = self._pending.get(request_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._pending[request_key] = pending
+        try:
+            job = await self._submit(db, kind, params, symbols)
+            pending.set_result(job)
+            return job
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # the caller re-raises it; don't warn if nobody else waited
+            raise
+        finally:
+            del self._pending[request_key]
+
+    async def _submit(self, db, kind: str, params: dict, symbols: List[str]) -> BacktestJob:
+        # Make sure every symbol is in the column cache so the data version is meaningful
+        for symbol in symbols:
+            if not price_cache.has(symbol):
+                await sync_symbol(db, price_cache, symbol, rebuild=True)
+
+        key = self.cache_key(kind, params, symbols)
+        job = self._jobs.get(key)
+        if job is not None and job.status != "failed":
+            return job
+
+        job = BacktestJob(key, kind, params)
+        record = await db.get(BacktestResultRecord, key)
+        if record is not None:
+            job.status, job.progress, job.result, job.cached = "done", 1.0, record.result, True
+            job.finished_at = record.created_at
+            self._track(job)
+            return job
+
+        self._track(job)
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _track(self, job: BacktestJob) -> None:
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+        while len(self._jobs) > MAX_TRACKED_JOBS:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.finished:
+                break
+            del self._jobs[oldest_id]
+
+    async def _run(self, job: BacktestJob) -> None:
+        async with self._slots:
+            job.status = "running"
+            job.publish()
+            started = time.perf_counter()
+            try:
+                job.result = await self._execute(job)
+                job.status, job.progress = "done", 1.0
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+            job.finished_at = datetime.utcnow()
+
+        if job.status == "done":
+            try:
+                async with async_session() as db:
+                    db.add(BacktestResultRecord(
+                        cache_key=job.id,
+                        kind=job.kind,
+                        request=job.params,
+                        result=job.result,
+                        duration_ms=int((time.perf_counter() - started) * 1000),
+                    ))
+                    await db.commit()
+            except Exception as e:
+                logger.error("Could not persist backtest result %s: %s", job.id, e)
+        job.publish()
+
+    async def _execute(self, job: BacktestJob) -> dict:
+        loop = asyncio.get_running_loop()
+        params = job.params
+        if job.kind == "backtest":
+            return await loop.run_in_executor(get_sweep_executor(), run_cached_backtest, price_cache.root, params)
+        if job.kind == "portfolio":
+            return await loop.run_in_executor(get_sweep_executor(), run_cached_portfolio_backtest, price_cache.root, params)
+        if job.kind == "sweep":
+            def on_progress(done, total):
+                job.progress = done / total
+                job.publish()
+
+            return await run_sweep(
+                None,
+                params["symbols"],
+                _window_range(params["short_windows"]),
+                _window_range(params["long_windows"]),
+                start=_as_date(params["start_date"]),
+                end=_as_date(params["end_date"]),
+                commission=params["commission"],
+                metric=params["metric"],
+                top_n=params["top_n"],
+                on_progress=on_progress,
+            )
+        raise ValueError(f"Unknown backtest job kind: {job.kind}")
+
+
+backtest_jobs = BacktestJobManager()
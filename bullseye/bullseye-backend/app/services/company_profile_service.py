@@ -0,0 +1,56 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.crud import get_company_profiles, upsert_company_profile
+from app.models import CompanyProfile, PortfolioStock
+from app.services.alpha_vantage_service import AlphaVantageService
+from app.services.rate_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+# OVERVIEW data barely changes, so a monthly refresh is plenty
+PROFILE_MAX_AGE = timedelta(days=30)
+
+
+async def ensure_company_profile(db: AsyncSession, av_service: AlphaVantageService, symbol: str):
+    """Return the stored profile for a symbol, fetching it from upstream the first time we see it."""
+    symbol = symbol.upper()
+    profiles = await get_company_profiles(db, [symbol])
+    if symbol in profiles:
+        return profiles[symbol]
+
+    overview = await av_service.get_company_overview(symbol)
+    if not overview:
+        return None
+    return await upsert_company_profile(db, symbol, overview)
+
+
+async def refresh_company_profiles(db: AsyncSession, av_service: AlphaVantageService, max_age: timedelta = PROFILE_MAX_AGE):
+    """
+    Fill in missing profiles and refresh stale ones for every symbol someone holds.
+    Returns the number of profiles written.
+    """
+    cutoff = datetime.utcnow() - max_age
+    stmt = (
+        select(PortfolioStock.symbol)
+        .outerjoin(CompanyProfile, CompanyProfile.symbol == PortfolioStock.symbol)
+        .where(or_(CompanyProfile.symbol.is_(None), CompanyProfile.updated_at < cutoff))
+        .distinct()
+    )
+    result = await db.execute(stmt)
+    symbols = [row[0].upper() for row in result.all() if row[0]]
+    if not symbols:
+        return 0
+
+    # Background refresh: batch timeout is generous because we queue behind interactive traffic
+    overviews = await av_service.get_company_overviews(symbols, timeout=300, priority=Priority.INGESTION)
+    written = 0
+    for symbol, overview in overviews.items():
+        if isinstance(overview, dict):
+            await upsert_company_profile(db, symbol, overview, commit=False)
+            written += 1
+        else:
+            logger.warning("Could not refresh company profile for %s: %s", symbol, overview)
+    await db.commit()
+    return written
@@ -0,0 +1,316 @@
+import math
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from app.models.indicatorstate import IndicatorState
+from app.services.price_cache import price_cache
+
+# Default indicator set shown on the Strategy page
+SMA_WINDOWS = (20, 50)
+EMA_WINDOWS = (12, 26)
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_WINDOW, BOLLINGER_WIDTH = 20, 2.0
+# Only adjusted closes are stored, so %K uses the close-only high/low range
+STOCH_WINDOW, STOCH_SMOOTH = 14, 3
+
+# Chunk length for the closed-form EMA; keeps (1 - alpha) ** -k well inside float range
+_EMA_CHUNK = 256
+
+
+# --- streaming state, O(1) per bar (amortized for the min/max deques) ---
+
+class RollingWindow:
+    """Fixed-size window with running sum and sum of squares."""
+
+    def __init__(self, size: int, values=None):
+        self.size = size
+        self.values = deque(values or [], maxlen=size)
+        self.total = math.fsum(self.values)
+        self.total_sq = math.fsum(v * v for v in self.values)
+
+    def push(self, value: float) -> None:
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        return self.total / self.size if self.full else math.nan
+
+    def std(self) -> float:
+        if not self.full:
+            return math.nan
+        mean = self.total / self.size
+        return math.sqrt(max(self.total_sq / self.size - mean * mean, 0.0))
+
+
+class Ema:
+    """EMA seeded with the SMA of its first `window` inputs."""
+
+    def __init__(self, window: int, alpha: Optional[float] = None, value: float = math.nan, seed=None):
+        self.window = window
+        self.alpha = alpha if alpha is not None else 2.0 / (window + 1)
+        self.value = value
+        self.seed = list(seed or [])
+
+    def push(self, x: float) -> float:
+        if math.isnan(x):
+            return self.value
+        if math.isnan(self.value):
+            self.seed.append(x)
+            if len(self.seed) == self.window:
+                self.value = math.fsum(self.seed) / self.window
+                self.seed = []
+            return self.value
+        self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def to_state(self) -> dict:
+        return {"value": None if math.isnan(self.value) else self.value, "seed": self.seed}
+
+    @classmethod
+    def from_state(cls, window: int, state: dict, alpha: Optional[float] = None) -> "Ema":
+        value = state["value"] if state["value"] is not None else math.nan
+        return cls(window, alpha, value, state["seed"])
+
+
+class RollingExtreme:
+    """Rolling min or max over the last `window` bars using a monotonic deque."""
+
+    def __init__(self, window: int, is_max: bool, items=None, index: int = 0):
+        self.window = window
+        self.is_max = is_max
+        self.items = deque(tuple(item) for item in (items or []))
+        self.index = index
+
+    def push(self, value: float) -> float:
+        beats = (lambda a, b: a >= b) if self.is_max else (lambda a, b: a <= b)
+        while self.items and beats(value, self.items[-1][1]):
+            self.items.pop()
+        self.items.append((self.index, value))
+        while self.items[0][0] <= self.index - self.window:
+            self.items.popleft()
+        self.index += 1
+        return self.items[0][1] if self.index >= self.window else math.nan
+
+
+class IndicatorEngine:
+    """
+    Incremental SMA/EMA/RSI/MACD/Bollinger/Stochastic state for one symbol.
+    update() consumes one close and returns the latest values; to_state()
+    round-trips through JSON so the engine resumes after a restart without
+    replaying history.
+    """
+
+    def __init__(self, state: Optional[dict] = None):
+        state = state or {}
+        self.bars = state.get("bars", 0)
+        self.prev_close = state.get("prev_close")
+        self.windows = {
+            w: RollingWindow(w, state.get("windows", {}).get(str(w))) for w in set(SMA_WINDOWS) | {BOLLINGER_WINDOW}
+        }
+        ema_state = state.get("emas", {})
+        self.emas = {
+            w: Ema.from_state(w, ema_state[str(w)]) if str(w) in ema_state else Ema(w)
+            for w in set(EMA_WINDOWS) | {MACD_FAST, MACD_SLOW}
+        }
+        self.macd_signal = Ema.from_state(MACD_SIGNAL, state["macd_signal"]) if "macd_signal" in state else Ema(MACD_SIGNAL)
+        wilder = 1.0 / RSI_WINDOW
+        self.avg_gain = Ema.from_state(RSI_WINDOW, state["avg_gain"], wilder) if "avg_gain" in state else Ema(RSI_WINDOW, wilder)
+        self.avg_loss = Ema.from_state(RSI_WINDOW, state["avg_loss"], wilder) if "avg_loss" in state else Ema(RSI_WINDOW, wilder)
+        stoch = state.get("stoch", {})
+        self.stoch_high = RollingExtreme(STOCH_WINDOW, True, stoch.get("high"), stoch.get("index", 0))
+        self.stoch_low = RollingExtreme(STOCH_WINDOW, False, stoch.get("low"), stoch.get("index", 0))
+        self.stoch_k = RollingWindow(STOCH_SMOOTH, stoch.get("k"))
+        self.latest: Dict[str, Optional[float]] = state.get("latest", {})
+
+    def update(self, close: float) -> Dict[str, Optional[float]]:
+        values = {}
+        for w in self.windows.values():
+            w.push(close)
+        for w in SMA_WINDOWS:
+            values[f"sma_{w}"] = self.windows[w].mean()
+        for w, ema in self.emas.items():
+            ema.push(close)
+        for w in EMA_WINDOWS:
+            values[f"ema_{w}"] = self.emas[w].value
+
+        macd = self.emas[MACD_FAST].value - self.emas[MACD_SLOW].value
+        signal = self.macd_signal.push(macd)
+        values["macd"], values["macd_signal"], values["macd_hist"] = macd, signal, macd - signal
+
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain, loss = self.avg_gain.push(max(change, 0.0)), self.avg_loss.push(max(-change, 0.0))
+            values["rsi_14"] = _rsi(gain, loss)
+        else:
+            values["rsi_14"] = math.nan
+        self.prev_close = close
+
+        bb = self.windows[BOLLINGER_WINDOW]
+        mid, std = bb.mean(), bb.std()
+        values["bb_mid"], values["bb_upper"], values["bb_lower"] = mid, mid + BOLLINGER_WIDTH * std, mid - BOLLINGER_WIDTH * std
+
+        high, low = self.stoch_high.push(close), self.stoch_low.push(close)
+        k = _stoch_k(close, high, low)
+        if not math.isnan(k):
+            self.stoch_k.push(k)
+        values["stoch_k"], values["stoch_d"] = k, self.stoch_k.mean()
+
+        self.bars += 1
+        self.latest = {key: None if math.isnan(v) else v for key, v in values.items()}
+        return self.latest
+
+    def to_state(self) -> dict:
+        return {
+            "bars": self.bars,
+            "prev_close": self.prev_close,
+            "windows": {str(w): list(win.values) for w, win in self.windows.items()},
+            "emas": {str(w): ema.to_state() for w, ema in self.emas.items()},
+            "macd_signal": self.macd_signal.to_state(),
+            "avg_gain": self.avg_gain.to_state(),
+            "avg_loss": self.avg_loss.to_state(),
+            "stoch": {
+                "index": self.stoch_high.index,
+                "high": [list(item) for item in self.stoch_high.items],
+                "low": [list(item) for item in self.stoch_low.items],
+                "k": list(self.stoch_k.values),
+            },
+            "latest": self.latest,
+        }
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> float:
+    if math.isnan(avg_gain) or math.isnan(avg_loss):
+        return math.nan
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def _stoch_k(close: float, high: float, low: float) -> float:
+    if math.isnan(high) or math.isnan(low):
+        return math.nan
+    return 100.0 * (close - low) / (high - low) if high > low else 50.0
+
+
+# --- vectorized batch mode: same definitions over a whole series ---
+
+def _sma(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if window <= len(x):
+        out[window - 1:] = sliding_window_view(x, window).mean(axis=1)
+    return out
+
+
+def _ema(x: np.ndarray, window: int, alpha: Optional[float] = None) -> np.ndarray:
+    """
+    EMA seeded with the SMA of the first `window` non-NaN inputs, matching Ema.
+    The recursion y = (1 - a) y + a x is solved in closed form chunk by chunk.
+    """
+    alpha = alpha if alpha is not None else 2.0 / (window + 1)
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) < window:
+        return out
+    seed_at = valid[window - 1]
+    y = x[valid[:window]].mean()
+    out[seed_at] = y
+    rest = x[seed_at + 1:]
+    decay = 1.0 - alpha
+    for start in range(0, len(rest), _EMA_CHUNK):
+        chunk = rest[start:start + _EMA_CHUNK]
+        k = np.arange(1, len(chunk) + 1)
+        # y_k = d^k * (y_0 + a * sum_{j<=k} x_j * d^-j)
+        ys = decay ** k * (y + alpha * np.cumsum(chunk * decay ** -k))
+        out[seed_at + 1 + start:seed_at + 1 + start + len(chunk)] = ys
+        y = ys[-1]
+    return out
+
+
+def batch_indicators(closes: np.ndarray) -> Dict[str, np.ndarray]:
+    """Every indicator IndicatorEngine produces, for a whole close series at once."""
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
+    out = {}
+    for w in SMA_WINDOWS:
+        out[f"sma_{w}"] = _sma(closes, w)
+    emas = {w: _ema(closes, w) for w in set(EMA_WINDOWS) | {MACD_FAST, MACD_SLOW}}
+    for w in EMA_WINDOWS:
+        out[f"ema_{w}"] = emas[w]
+
+    macd = emas[MACD_FAST] - emas[MACD_SLOW]
+    signal = _ema(macd, MACD_SIGNAL)
+    out["macd"], out["macd_signal"], out["macd_hist"] = macd, signal, macd - signal
+
+    changes = np.diff(closes, prepend=np.nan)
+    avg_gain = _ema(np.where(np.isnan(changes), np.nan, np.maximum(changes, 0.0)), RSI_WINDOW, 1.0 / RSI_WINDOW)
+    avg_loss = _ema(np.where(np.isnan(changes), np.nan, np.maximum(-changes, 0.0)), RSI_WINDOW, 1.0 / RSI_WINDOW)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), rsi)
+    out["rsi_14"] = np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi)
+
+    mid = _sma(closes, BOLLINGER_WINDOW)
+    std = np.full(n, np.nan)
+    if BOLLINGER_WINDOW <= n:
+        std[BOLLINGER_WINDOW - 1:] = sliding_window_view(closes, BOLLINGER_WINDOW).std(axis=1)
+    out["bb_mid"], out["bb_upper"], out["bb_lower"] = mid, mid + BOLLINGER_WIDTH * std, mid - BOLLINGER_WIDTH * std
+
+    high, low = np.full(n, np.nan), np.full(n, np.nan)
+    if STOCH_WINDOW <= n:
+        windows = sliding_window_view(closes, STOCH_WINDOW)
+        high[STOCH_WINDOW - 1:], low[STOCH_WINDOW - 1:] = windows.max(axis=1), windows.min(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(high > low, 100.0 * (closes - low) / (high - low), 50.0)
+    k = np.where(np.isnan(high), np.nan, k)
+    out["stoch_k"] = k
+    d = np.full(n, np.nan)
+    valid = np.flatnonzero(~np.isnan(k))
+    if len(valid) >= STOCH_SMOOTH:
+        d[valid[STOCH_SMOOTH - 1:]] = _sma(k[valid], STOCH_SMOOTH)[STOCH_SMOOTH - 1:]
+    out["stoch_d"] = d
+    return out
+
+
+# --- persistence: fold newly ingested bars into the stored state ---
+
+async def update_symbol_indicators(db, symbol: str, rebuild: bool = False) -> int:
+    """
+    Advance a symbol's stored indicator state over bars newer than its
+    last_date (read from the price cache), or replay the whole series when
+    rebuild is set. Returns the number of bars processed.
+    """
+    symbol = symbol.upper()
+    record = await db.get(IndicatorState, symbol)
+    if record is None or rebuild:
+        engine, start = IndicatorEngine(), None
+    else:
+        engine, start = IndicatorEngine(record.state), record.last_date + timedelta(days=1)
+
+    series = price_cache.load(symbol, start=start)
+    if series is None or len(series[0]) == 0:
+        return 0
+    dates, closes = series
+    for close in closes.tolist():
+        engine.update(close)
+
+    if record is None:
+        record = IndicatorState(symbol=symbol)
+        db.add(record)
+    record.last_date = dates[-1].item()
+    record.state = engine.to_state()
+    record.latest = engine.latest
+    record.updated_at = datetime.utcnow()
+    await db.commit()
+    return len(closes)
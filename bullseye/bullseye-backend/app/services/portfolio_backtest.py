@@ -0,0 +1,139 @@
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+from app.services.backtest import summarize
+from app.services.price_cache import PriceCache
+
+
+def build_price_matrix(cache: PriceCache, symbols: List[str], start: Optional[date] = None, end: Optional[date] = None):
+    """
+    Align every symbol's cached closes on the union of their trading dates.
+    Returns (calendar, matrix) where matrix is (len(calendar), len(symbols)),
+    forward-filled, and NaN before a symbol's first bar.
+    """
+    series = [cache.load(symbol, start, end) for symbol in symbols]
+    series = [s if s is not None else (np.empty(0, "datetime64[D]"), np.empty(0)) for s in series]
+    calendar = np.unique(np.concatenate([dates for dates, _ in series])) if series else np.empty(0, "datetime64[D]")
+
+    matrix = np.full((len(calendar), len(symbols)), np.nan)
+    for j, (dates, closes) in enumerate(series):
+        matrix[np.searchsorted(calendar, dates), j] = closes
+
+    # forward-fill each column: index of the last observed row at or before each row
+    observed = ~np.isnan(matrix)
+    last_seen = np.where(observed, np.arange(len(calendar))[:, None], 0)
+    np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+    filled = matrix[last_seen, np.arange(len(symbols))]
+    filled[np.maximum.accumulate(observed, axis=0) == 0] = np.nan
+    return calendar, filled
+
+
+def rolling_mean_2d(prices: np.ndarray, window: int) -> np.ndarray:
+    """Column-wise SMA; NaN until a column has `window` real prices."""
+    valid = ~np.isnan(prices)
+    values = np.concatenate((np.zeros((1, prices.shape[1])), np.cumsum(np.where(valid, prices, 0.0), axis=0)))
+    counts = np.concatenate((np.zeros((1, prices.shape[1])), np.cumsum(valid, axis=0)))
+    out = np.full(prices.shape, np.nan)
+    if window <= len(prices):
+        window_sum = values[window:] - values[:-window]
+        window_count = counts[window:] - counts[:-window]
+        out[window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+    return out
+
+
+def run_portfolio_crossover(
+    symbols: List[str],
+    calendar: np.ndarray,
+    prices: np.ndarray,
+    initial_shares: np.ndarray,
+    initial_cash: float,
+    short_window: int,
+    long_window: int,
+    commission: float = 0.0,
+    rebalance_every: int = 21,
+) -> Dict:
+    """
+    Long/flat SMA crossover across all columns at once. The simulation starts
+    on the first bar where every starting holding has a price, and the
+    starting holdings are kept until the first rebalance. At each rebalance
+    (every `rebalance_every` bars, or when any signal flips) equity is split
+    equally across symbols with an active signal, the rest stays in cash, and
+    commission is charged on traded notional.
+
+    Fills use the same convention as backtest.run_sma_crossover: orders fill
+    at the close of the bar whose signal triggered them, and that bar's return
+    still accrues to the previous holdings.
+    """
+    if short_window >= long_window:
+        raise ValueError("short_window must be smaller than long_window")
+    n, k = prices.shape
+    if n <= long_window:
+        raise ValueError(f"Need more than {long_window} aligned bars, got {n}")
+
+    shares = np.asarray(initial_shares, dtype=np.float64).copy()
+    cash = float(initial_cash)
+    # Valuing a holding before its first bar would need a future price, so start once all are priced
+    held = shares != 0
+    priced = ~np.isnan(prices)
+    if held.any() and not priced[:, held].any(axis=0).all():
+        missing = [symbol for symbol, ok in zip(symbols, priced[:, held].any(axis=0)) if not ok]
+        raise ValueError(f"No prices for held symbols: {', '.join(missing)}")
+    start = int(np.argmax(priced[:, held], axis=0).max()) if held.any() else 0
+    if n - start < 2:
+        raise ValueError("Need at least two bars once every holding has a price")
+
+    # Signals use the full history so the SMAs are warm at the start bar
+    signal = (rolling_mean_2d(prices, short_window) > rolling_mean_2d(prices, long_window))[start:]
+    calendar, prices = calendar[start:], prices[start:]
+    n = len(prices)
+    tradable = np.nan_to_num(prices, nan=0.0)
+
+    rebalance = np.zeros(n, dtype=bool)
+    rebalance[1:] = np.any(signal[1:] != signal[:-1], axis=1)
+    rebalance[max(0, long_window - start)::max(1, rebalance_every)] = True
+    # An order on the last bar would only fill after the backtest ends
+    rebalance[-1] = False
+
+    initial_capital = cash + shares @ tradable[0]
+
+    # Holdings are constant between rebalances, so each segment is one matrix product
+    equity = np.empty(n)
+    entry_price = np.full(k, np.nan)
+    trades = []
+    bounds = np.concatenate(([0], np.flatnonzero(rebalance), [n]))
+    for seg_start, seg_end in zip(bounds[:-1], bounds[1:]):
+        if seg_start == seg_end:
+            continue
+        if rebalance[seg_start]:
+            row = tradable[seg_start]
+            value = cash + shares @ row
+            active = signal[seg_start] & (row > 0)
+            target = np.zeros(k)
+            if active.any():
+                target[active] = value / active.sum() / row[active]
+            traded = np.abs(target - shares) @ row
+            cash = value - target @ row - traded * commission
+            # Round trips per symbol, net of the commission on both legs; starting holdings have no entry
+            closed = (shares > 0) & ~active
+            trades.extend(row[closed] * (1 - commission) / (entry_price[closed] * (1 + commission)) - 1.0)
+            entry_price[closed] = np.nan
+            opened = active & ~(shares > 0)
+            entry_price[opened] = row[opened]
+            shares = target
+        equity[seg_start:seg_end] = cash + tradable[seg_start:seg_end] @ shares
+
+    # Open trades are marked at the last close
+    still_open = (shares > 0) & ~np.isnan(entry_price)
+    trades.extend(tradable[-1][still_open] / (entry_price[still_open] * (1 + commission)) - 1.0)
+    trades = np.asarray(trades, dtype=np.float64)
+    trades = trades[np.isfinite(trades)]
+
+    returns = np.zeros(n)
+    returns[1:] = equity[1:] / equity[:-1] - 1.0
+
+    result = summarize(calendar, equity, returns, trades, initial_capital)
+    result["initialCapital"] = round(float(initial_capital), 2)
+    weights = shares * tradable[-1] / equity[-1] if equity[-1] else np.zeros(k)
+    result["finalWeights"] = {symbol: round(float(w), 4) for symbol, w in zip(symbols, weights)}
+    result["finalWeights"]["CASH"] = round(cash / equity[-1], 4) if equity[-1] else 0.0
+    return result
@@ -0,0 +1,83 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import PortfolioNavDaily, PortfolioStock, StockDailyPrice, User
+
+
+def _nav_select(start: date, end: Optional[date]):
+    """One row per (user, trading day): holdings valued at the last close on or before that day."""
+    days = select(StockDailyPrice.date).where(StockDailyPrice.date >= start)
+    if end is not None:
+        days = days.where(StockDailyPrice.date <= end)
+    days = days.distinct().subquery("days")
+
+    symbol = func.upper(PortfolioStock.symbol)
+    holdings = (
+        select(PortfolioStock.user_id, symbol.label("symbol"), func.sum(PortfolioStock.shares).label("shares"))
+        .group_by(PortfolioStock.user_id, symbol)
+        .subquery("holdings")
+    )
+    # Carries the last close forward over a symbol's missing days
+    price = (
+        select(StockDailyPrice.adjusted_close)
+        .where(StockDailyPrice.symbol == holdings.c.symbol, StockDailyPrice.date <= days.c.date)
+        .order_by(StockDailyPrice.date.desc())
+        .limit(1)
+        .lateral("price")
+    )
+
+    stock_value = func.coalesce(func.sum(holdings.c.shares * price.c.adjusted_close), 0.0)
+    cash = func.coalesce(User.cash_balance, 0.0)
+    return (
+        select(User.id, days.c.date, stock_value, cash, stock_value + cash)
+        .select_from(User)
+        .join(days, true())
+        .outerjoin(holdings, holdings.c.user_id == User.id)
+        .outerjoin(price, true())
+        .group_by(User.id, days.c.date, User.cash_balance)
+    )
+
+
+async def materialize_portfolio_nav(
+    db: AsyncSession,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> int:
+    """
+    Upsert portfolio_nav_daily for every user and trading day in [start, end]
+    with a single INSERT ... SELECT. Without a start it resumes from the last
+    materialized day, re-stating that day in case some of its closes landed
+    after it was first written. Returns rows written.
+
+    There is no transaction history, so every row uses the current holdings
+    and cash; a backfill values today's portfolio at past prices.
+    """
+    if start is None:
+        start = await db.scalar(select(func.max(PortfolioNavDaily.date)))
+    if start is None:
+        # First run: just the latest trading day. Use backfill_portfolio_nav for history.
+        start = await db.scalar(select(func.max(StockDailyPrice.date)))
+    if start is None:
+        return 0
+
+    stmt = pg_insert(PortfolioNavDaily).from_select(
+        ["user_id", "date", "stock_value", "cash", "nav"], _nav_select(start, end)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PortfolioNavDaily.user_id, PortfolioNavDaily.date],
+        set_={k: stmt.excluded[k] for k in ("stock_value", "cash", "nav")},
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount
+
+
+async def backfill_portfolio_nav(db: AsyncSession, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """Materialize NAV history from start (default: the earliest stored close)."""
+    if start is None:
+        start = await db.scalar(select(func.min(StockDailyPrice.date)))
+    if start is None:
+        return 0
+    return await materialize_portfolio_nav(db, start, end)
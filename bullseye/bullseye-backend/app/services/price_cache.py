@@ -0,0 +1,173 @@
+import os
+from datetime import date
+from typing import Optional
+import numpy as np
+from sqlalchemy import select
+from app.models.dailyprice import StockDailyPrice
+from app.schemas.symbol import normalize_symbol
+
+# Where the per-symbol price files live
+PRICE_CACHE_DIR = os.getenv(
+    "PRICE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "data", "price_cache")
+)
+
+DATE_DTYPE = np.dtype("datetime64[D]")
+CLOSE_DTYPE = np.dtype("float64")
+# One fixed-size (date, close) record per trading day; a row is written with a single write,
+# so a crash mid-append can only leave a torn trailing record, never misaligned columns
+ROW_DTYPE = np.dtype([("date", DATE_DTYPE), ("close", CLOSE_DTYPE)])
+
+
+class PriceCache:
+    """
+    Read-side cache of adjusted closes. Each symbol is one raw, append-only
+    file of (date, close) records opened as a read-only memmap, so the date
+    and close columns are zero-copy views that never touch Postgres.
+    """
+
+    def __init__(self, root: str = PRICE_CACHE_DIR):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        # symbol -> ((st_ino, st_size, st_mtime_ns) when mapped, dates view, closes view)
+        self._maps = {}
+
+    def _path(self, symbol: str) -> str:
+        # The symbol becomes a file name; normalize_symbol rejects anything that could leave root
+        return os.path.join(self.root, normalize_symbol(symbol) + ".prices")
+
+    def _open(self, symbol: str):
+        symbol = symbol.upper()
+        path = self._path(symbol)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._maps.pop(symbol, None)
+            return None
+        # A same-size os.replace from another process still changes the inode
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = self._maps.get(symbol)
+        if cached and cached[0] == key:
+            return cached[1], cached[2]
+
+        # Whole records only; a torn trailing record from an interrupted append is ignored
+        length = stat.st_size // ROW_DTYPE.itemsize
+        if length == 0:
+            dates, closes = np.empty(0, DATE_DTYPE), np.empty(0, CLOSE_DTYPE)
+        else:
+            rows = np.memmap(path, dtype=ROW_DTYPE, mode="r", shape=(length,))
+            dates, closes = rows["date"], rows["close"]
+        self._maps[symbol] = (key, dates, closes)
+        return dates, closes
+
+    def has(self, symbol: str) -> bool:
+        return self._open(symbol) is not None
+
+    def version(self, symbol: str) -> Optional[str]:
+        """Changes whenever the symbol's rows are appended to or rewritten."""
+        try:
+            stat = os.stat(self._path(symbol))
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        arrays = self._open(symbol)
+        if arrays is None or len(arrays[0]) == 0:
+            return None
+        return arrays[0][-1].item()
+
+    def load(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None):
+        """
+        Zero-copy (dates, closes) views for start <= date <= end, or None if
+        the symbol isn't cached.
+        """
+        arrays = self._open(symbol)
+        if arrays is None:
+            return None
+        dates, closes = arrays
+        lo = np.searchsorted(dates, np.datetime64(start, "D")) if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, "D"), side="right") if end else len(dates)
+        return dates[lo:hi], closes[lo:hi]
+
+    @staticmethod
+    def _rows(dates: np.ndarray, closes: np.ndarray) -> np.ndarray:
+        rows = np.empty(len(dates), dtype=ROW_DTYPE)
+        rows["date"] = dates
+        rows["close"] = closes
+        return rows
+
+    def write(self, symbol: str, dates: np.ndarray, closes: np.ndarray) -> None:
+        """Atomically replace a symbol's rows."""
+        symbol = symbol.upper()
+        path = self._path(symbol)
+        tmp = path + ".tmp"
+        self._rows(dates, closes).tofile(tmp)
+        os.replace(tmp, path)
+        self._maps.pop(symbol, None)
+
+    def append(self, symbol: str, dates: np.ndarray, closes: np.ndarray) -> None:
+        """Append rows that are strictly newer than the cached tail."""
+        if len(dates) == 0:
+            return
+        symbol = symbol.upper()
+        last = self.last_date(symbol)
+        if last is not None and np.datetime64(last, "D") >= dates[0]:
+            raise ValueError(f"Append for {symbol} is not after cached tail {last}")
+        with open(self._path(symbol), "r+b") as f:
+            # Cut off any torn record left by an interrupted append so the new rows stay aligned
+            f.truncate(os.fstat(f.fileno()).st_size // ROW_DTYPE.itemsize * ROW_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+            self._rows(dates, closes).tofile(f)
+        self._maps.pop(symbol, None)
+
+    def drop(self, symbol: str) -> None:
+        path = self._path(symbol)
+        if os.path.exists(path):
+            os.remove(path)
+        self._maps.pop(symbol.upper(), None)
+
+
+async def _fetch_columns(db, symbol: str, after: Optional[date] = None):
+    stmt = select(StockDailyPrice.date, StockDailyPrice.adjusted_close).where(StockDailyPrice.symbol == symbol)
+    if after is not None:
+        stmt = stmt.where(StockDailyPrice.date > after)
+    result = await db.execute(stmt.order_by(StockDailyPrice.date))
+    rows = result.all()
+    dates = np.fromiter((r[0].toordinal() for r in rows), dtype=np.int64, count=len(rows))
+    # date.toordinal() counts from 0001-01-01; shift onto the unix epoch for datetime64[D]
+    dates = (dates - date(1970, 1, 1).toordinal()).astype(DATE_DTYPE)
+    closes = np.fromiter((r[1] for r in rows), dtype=CLOSE_DTYPE, count=len(rows))
+    return dates, closes
+
+
+async def sync_symbol(db, cache: "PriceCache", symbol: str, rebuild: bool = False) -> int:
+    """
+    Bring a symbol's cached columns up to date with stock_daily_prices.
+    Appends only rows newer than the cached tail unless rebuild is set
+    (e.g. after a backfill rewrote older dates). A symbol with no stored
+    rows gets no cache file. Returns rows written.
+    """
+    symbol = normalize_symbol(symbol)
+    last = None if rebuild else cache.last_date(symbol)
+    dates, closes = await _fetch_columns(db, symbol, after=last)
+    if last is None and len(dates) == 0:
+        cache.drop(symbol)
+    elif last is None:
+        cache.write(symbol, dates, closes)
+    else:
+        cache.append(symbol, dates, closes)
+    return len(dates)
+
+
+async def load_prices(db, symbol: str, start: Optional[date] = None, end: Optional[date] = None):
+    """
+    Cached (dates, closes) for a symbol, building the cache from the DB on
+    first use; None if the symbol has no stored rows.
+    """
+    if not price_cache.has(symbol):
+        await sync_symbol(db, price_cache, symbol, rebuild=True)
+    return price_cache.load(symbol, start, end)
+
+
+# Shared by the API process and ingestion scripts
+price_cache = PriceCache()
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Point budget for charts when the client doesn't ask for one; roughly one point per horizontal pixel pair
+DEFAULT_HISTORY_POINTS = 500
+MAX_HISTORY_POINTS = 5000
+
+# format=binary: int32 days since 1970-01-01 for every point, then float32 closes, little-endian
+BINARY_MEDIA_TYPE = "application/vnd.bullseye.prices"
+BINARY_DAY_DTYPE = np.dtype("<i4")
+BINARY_CLOSE_DTYPE = np.dtype("<f4")
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets
+    (Steinarsson, 2013): the first and last points, plus per bucket the point
+    forming the largest triangle with the previously kept point and the mean
+    of the next bucket. Keeps peaks and troughs that striding would drop.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets over the interior points; each has at least one point since threshold < n
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    next_x = np.append((np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts)[1:], x[-1]).tolist()
+    next_y = np.append((np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts)[1:], y[-1]).tolist()
+
+    # Each bucket depends on the previous pick, so this is a loop; buckets hold a handful of
+    # points at chart sizes, where list arithmetic is several times faster than numpy slices
+    xs, ys, bounds = x.tolist(), y.tolist(), edges.tolist()
+    kept = [0]
+    a = 0
+    for i in range(threshold - 2):
+        ax, ay, bx, by = xs[a], ys[a], next_x[i], next_y[i]
+        best = -1.0
+        for j in range(bounds[i], bounds[i + 1]):
+            area = abs((ax - bx) * (ys[j] - ay) - (ax - xs[j]) * (by - ay))
+            if area > best:
+                best, a = area, j
+        kept.append(a)
+    kept.append(n - 1)
+    return np.array(kept, dtype=np.int64)
+
+
+def downsample(dates: np.ndarray, closes: np.ndarray, points: int):
+    """(dates, closes) reduced to at most `points` rows with LTTB."""
+    keep = lttb(dates.astype(np.int64).astype(np.float64), np.asarray(closes, dtype=np.float64), points)
+    return dates[keep], closes[keep]
+
+
+def encode_columns(symbol: str, dates: np.ndarray, closes: np.ndarray, total: int) -> dict:
+    """Parallel arrays instead of one object per row; keys aren't repeated per point."""
+    return {
+        "symbol": symbol,
+        "points": len(dates),
+        "source_points": total,
+        "dates": dates.astype(str).tolist(),
+        "close": np.round(closes.astype(np.float64), 4).tolist(),
+    }
+
+
+def encode_binary(dates: np.ndarray, closes: np.ndarray) -> bytes:
+    return (
+        dates.astype(np.int64).astype(BINARY_DAY_DTYPE).tobytes()
+        + np.asarray(closes).astype(BINARY_CLOSE_DTYPE).tobytes()
+    )
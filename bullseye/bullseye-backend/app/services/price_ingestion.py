@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+from app.core.crud import (
+    add_ingestion_run,
+    bulk_upsert_daily_prices,
+    find_symbols_with_price_gaps,
+    get_ingestion_run_totals,
+    get_ingestion_states,
+    get_stored_price_ranges,
+    save_ingestion_state,
+)
+from app.core.database import async_session
+from app.core.metrics import set_ingestion_metrics
+from app.services.alpha_vantage_service import AlphaVantageService
+from app.services.indicators import update_symbol_indicators
+from app.services.price_cache import price_cache, sync_symbol
+from app.services.signals import refresh_signals
+
+logger = logging.getLogger(__name__)
+
+# Symbols fetched/written in parallel; the rate scheduler still caps upstream calls
+INGESTION_CONCURRENCY = int(os.getenv("INGESTION_CONCURRENCY", "4"))
+# outputsize=compact returns the latest 100 bars; beyond this gap we need full history
+COMPACT_MAX_GAP_TRADING_DAYS = 95
+# Don't re-run a full backfill for the same holes more often than this
+BACKFILL_RETRY_AFTER = timedelta(days=30)
+
+
+# TIME_SERIES_DAILY_ADJUSTED field -> (stock_daily_prices column, type)
+BAR_FIELDS = (
+    ("1. open", "open", float),
+    ("2. high", "high", float),
+    ("3. low", "low", float),
+    ("4. close", "close", float),
+    ("6. volume", "volume", int),
+    ("7. dividend amount", "dividend_amount", float),
+    ("8. split coefficient", "split_coefficient", float),
+)
+
+
+def parse_daily_series(symbol: str, daily_data: dict) -> list:
+    """Turn a TIME_SERIES_DAILY_ADJUSTED payload into rows for bulk_upsert_daily_prices."""
+    rows = []
+    for date_str, data_point in daily_data.items():
+        row = {
+            "symbol": symbol,
+            "date": date.fromisoformat(date_str),
+            "adjusted_close": float(data_point["5. adjusted close"]),
+        }
+        for field, column, type_ in BAR_FIELDS:
+            value = data_point.get(field)
+            row[column] = type_(value) if value is not None else None
+        rows.append(row)
+    return rows
+
+
+def last_expected_trading_day(today: date) -> date:
+    """Most recent weekday strictly before today (daily bars land after the close)."""
+    day = today - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def trading_days_between(start: date, end: date) -> int:
+    """Weekdays in (start, end]. Ignores holidays, which only makes us fetch slightly more."""
+    if end <= start:
+        return 0
+    days = (end - start).days
+    full_weeks, remainder = divmod(days, 7)
+    count = full_weeks * 5
+    for i in range(1, remainder + 1):
+        if (start + timedelta(days=full_weeks * 7 + i)).weekday() < 5:
+            count += 1
+    return count
+
+
+async def plan_ingestion(db, symbols: Iterable[str], today: Optional[date] = None) -> list:
+    """
+    Decide per symbol whether to skip, fetch compact, or fetch full history,
+    from the stored watermarks. Costs three queries regardless of symbol count,
+    plus one write per symbol whose holes are newly recorded.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    today = today or date.today()
+    target = last_expected_trading_day(today)
+
+    states = await get_ingestion_states(db, symbols)
+    stored_ranges = await get_stored_price_ranges(db, symbols)
+    symbols_with_holes = await find_symbols_with_price_gaps(db, symbols)
+
+    plans = []
+    flagged = False
+    for symbol in symbols:
+        state = states.get(symbol)
+        first, last = stored_ranges.get(symbol, (None, None))
+        if state and state.last_stored_date:
+            last = max(last, state.last_stored_date) if last else state.last_stored_date
+
+        backfill_due = not state or not state.last_full_fetch_at or (
+            datetime.utcnow() - state.last_full_fetch_at > BACKFILL_RETRY_AFTER
+        )
+        has_holes = symbol in symbols_with_holes or (state is not None and state.needs_backfill)
+        if has_holes and not backfill_due and not (state and state.needs_backfill):
+            # Remember the holes now; the full fetch waits for the retry window
+            await save_ingestion_state(db, symbol, commit=False, needs_backfill=True)
+            flagged = True
+        needs_backfill = has_holes and backfill_due
+
+        if last is None:
+            plans.append({"symbol": symbol, "outputsize": "full", "since": None, "first": None, "reason": "new"})
+        elif needs_backfill:
+            plans.append({"symbol": symbol, "outputsize": "full", "since": None, "first": first, "reason": "backfill"})
+        elif last >= target or (state and state.last_success_at and state.last_success_at.date() >= today):
+            continue  # already current (or already fetched today, e.g. on a market holiday)
+        else:
+            gap = trading_days_between(last, target)
+            outputsize = "full" if gap > COMPACT_MAX_GAP_TRADING_DAYS else "compact"
+            plans.append({"symbol": symbol, "outputsize": outputsize, "since": last, "first": first, "reason": "gap"})
+    if flagged:
+        await db.commit()
+    return plans
+
+
+def is_corporate_action(row: dict) -> bool:
+    """True for a bar carrying a split or a dividend."""
+    split, dividend = row.get("split_coefficient"), row.get("dividend_amount")
+    return (split is not None and split != 1.0) or (dividend is not None and dividend > 0)
+
+
+async def _record_fetch_error(symbol: str, plan: dict, daily_data: Optional[dict], attempted_at: datetime) -> dict:
+    error = daily_data["error"] if daily_data else "No daily data returned"
+    logger.warning("Error fetching daily data for %s: %s", symbol, error)
+    state = {"last_attempt_at": attempted_at, "last_error": str(error)[:500]}
+    if plan["reason"] == "backfill":
+        # Keep the holes on record so the next run retries the full fetch
+        state["needs_backfill"] = True
+    async with async_session() as db:
+        await save_ingestion_state(db, symbol, **state)
+    return {"rows": 0, "budget_exhausted": bool(daily_data and daily_data.get("budget_exhausted"))}
+
+
+async def ingest_symbol(av_service: AlphaVantageService, plan: dict) -> dict:
+    """
+    Fetch one planned symbol and write its new rows plus its watermark in one
+    transaction, so a crash or quota hit resumes from the last committed symbol.
+    """
+    symbol = plan["symbol"]
+    attempted_at = datetime.utcnow()
+    daily_data = await av_service.get_daily_adjusted_time_series(symbol, outputsize=plan["outputsize"])
+    if not daily_data or daily_data.get("error"):
+        return await _record_fetch_error(symbol, plan, daily_data, attempted_at)
+
+    rows = parse_daily_series(symbol, daily_data)
+    if plan["since"] and plan["outputsize"] == "compact":
+        rows = [row for row in rows if row["date"] > plan["since"]]
+        if any(is_corporate_action(row) for row in rows):
+            # A split or dividend re-bases adjusted_close for every earlier date, so the stored
+            # history is stale. If this refetch fails nothing is written and the next run retries.
+            logger.info("Corporate action in new bars for %s; refetching full history", symbol)
+            plan = {**plan, "outputsize": "full", "reason": "corporate_action"}
+            daily_data = await av_service.get_daily_adjusted_time_series(symbol, outputsize="full")
+            if not daily_data or daily_data.get("error"):
+                return await _record_fetch_error(symbol, plan, daily_data, attempted_at)
+            rows = parse_daily_series(symbol, daily_data)
+
+    dates = [row["date"] for row in rows]
+    first = min(filter(None, [plan["first"], *dates]), default=None)
+    last = max(filter(None, [plan["since"], *dates]), default=None)
+    state = {
+        "first_stored_date": first,
+        "last_stored_date": last,
+        "last_attempt_at": attempted_at,
+        "last_success_at": attempted_at,
+        "last_error": None,
+    }
+    if plan["outputsize"] == "full":
+        state["last_full_fetch_at"] = attempted_at
+        state["needs_backfill"] = False
+
+    async with async_session() as db:
+        written = await bulk_upsert_daily_prices(db, rows, commit=False)
+        await save_ingestion_state(db, symbol, commit=False, **state)
+        await db.commit()
+
+        # Keep the analytics column cache in step; a full fetch may have rewritten old dates
+        # and advance the streaming indicators by the new bars only
+        rebuild = plan["outputsize"] == "full"
+        try:
+            await sync_symbol(db, price_cache, symbol, rebuild=rebuild)
+            await update_symbol_indicators(db, symbol, rebuild=rebuild)
+        except Exception as e:
+            logger.error("Could not update price cache/indicators for %s: %s", symbol, e)
+    return {"rows": written, "budget_exhausted": False}
+
+
+async def ingest_symbols(
+    av_service: AlphaVantageService,
+    symbols: Iterable[str],
+    concurrency: int = INGESTION_CONCURRENCY,
+) -> dict:
+    """
+    Incrementally ingest many symbols concurrently, skipping ones that are
+    already current. Stops scheduling new symbols once the rate budget is
+    exhausted; the next run picks up from the stored watermarks.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    started = time.perf_counter()
+    async with async_session() as db:
+        plans = await plan_ingestion(db, symbols)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    budget_exhausted = asyncio.Event()
+
+    async def run(plan):
+        async with semaphore:
+            if budget_exhausted.is_set():
+                return "deferred"
+            try:
+                result = await ingest_symbol(av_service, plan)
+            except Exception as e:
+                logger.exception("Failed to ingest %s: %s", plan["symbol"], e)
+                return None
+            if result["budget_exhausted"]:
+                budget_exhausted.set()
+                return "deferred"
+            return result["rows"]
+
+    results = await asyncio.gather(*(run(plan) for plan in plans))
+
+    # Re-materialize signals only for symbols that actually got new bars this run
+    changed = [plan["symbol"] for plan, r in zip(plans, results) if isinstance(r, int) and r > 0]
+    signals = 0
+    if changed:
+        try:
+            async with async_session() as db:
+                signals = await refresh_signals(db, changed)
+        except Exception as e:
+            logger.error("Could not refresh trading signals: %s", e)
+
+    elapsed = time.perf_counter() - started
+    rows = sum(r for r in results if isinstance(r, int))
+    stats = {
+        "symbols": len(symbols),
+        "skipped": len(symbols) - len(plans),
+        "full": sum(1 for p in plans if p["outputsize"] == "full"),
+        "compact": sum(1 for p in plans if p["outputsize"] == "compact"),
+        "failed": sum(1 for r in results if r is None),
+        "deferred": sum(1 for r in results if r == "deferred"),
+        "rows": rows,
+        "signals": signals,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    # Recorded in the database so the API process can publish it on /metrics
+    try:
+        async with async_session() as db:
+            await add_ingestion_run(db, stats)
+    except Exception as e:
+        logger.error("Could not record ingestion run: %s", e)
+    return stats
+
+
+async def refresh_ingestion_metrics(db) -> None:
+    """Load the recorded ingestion runs into the /metrics gauges."""
+    total_rows, latest_run = await get_ingestion_run_totals(db)
+    set_ingestion_metrics(total_rows, latest_run)
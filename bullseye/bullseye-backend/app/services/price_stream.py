@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional, Set
+from app.services.alpha_vantage_service import QUOTE_CACHE_TTL_SECONDS, AlphaVantageService
+from app.services.rate_scheduler import CALLS_PER_MINUTE
+
+logger = logging.getLogger(__name__)
+
+# One refresh per symbol per interval, however many clients watch it; no point polling faster than the quote cache
+PRICE_STREAM_INTERVAL_SECONDS = float(os.getenv("PRICE_STREAM_INTERVAL_SECONDS", str(QUOTE_CACHE_TTL_SECONDS)))
+PRICE_STREAM_MAX_SYMBOLS_PER_CONNECTION = int(os.getenv("PRICE_STREAM_MAX_SYMBOLS_PER_CONNECTION", "50"))
+# Refreshes only spend idle budget, so by default stream no more symbols than the per-minute
+# quota can refresh once per interval (1 on the free tier); more would mostly re-send stale quotes
+PRICE_STREAM_MAX_SYMBOLS = int(os.getenv(
+    "PRICE_STREAM_MAX_SYMBOLS", str(max(1, int(CALLS_PER_MINUTE * PRICE_STREAM_INTERVAL_SECONDS // 60)))
+))
+# A client that cannot take one message within this long is disconnected
+PRICE_STREAM_SEND_TIMEOUT_SECONDS = float(os.getenv("PRICE_STREAM_SEND_TIMEOUT_SECONDS", "10"))
+
+
+class Subscription:
+    """
+    One connected client. Updates are coalesced per symbol: if the client
+    has not taken the previous quote for a symbol yet, the newer one replaces
+    it, so a slow consumer only ever has one pending quote per symbol.
+    """
+
+    def __init__(self):
+        self.symbols: Set[str] = set()
+        self._pending: Dict[str, Any] = {}
+        self._ready = asyncio.Event()
+        self.coalesced = 0
+
+    def push(self, symbol: str, quote: Any) -> None:
+        if symbol in self._pending:
+            self.coalesced += 1
+        self._pending[symbol] = quote
+        self._ready.set()
+
+    async def next_batch(self) -> Dict[str, Any]:
+        """Wait for updates and take everything pending."""
+        await self._ready.wait()
+        self._ready.clear()
+        batch, self._pending = self._pending, {}
+        return batch
+
+
+class _Topic:
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.last: Optional[Any] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class PriceHub:
+    """
+    Fans live quotes out to subscribed clients with exactly one refresh loop
+    per distinct subscribed symbol, so upstream load follows the number of
+    symbols watched rather than the number of clients watching them. Loops
+    refresh at warming priority and never take budget from interactive
+    requests; without spare budget they re-send what the quote cache holds.
+    """
+
+    def __init__(self, av_service: AlphaVantageService, interval: float = PRICE_STREAM_INTERVAL_SECONDS):
+        self.av_service = av_service
+        self.interval = interval
+        self._topics: Dict[str, _Topic] = {}
+        self.published = 0
+
+    def subscribe(self, subscription: Subscription, symbols: Iterable[str]) -> Set[str]:
+        """Add symbols to a subscription; returns the symbols actually added."""
+        added = set()
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            if symbol in subscription.symbols:
+                continue
+            if len(subscription.symbols) >= PRICE_STREAM_MAX_SYMBOLS_PER_CONNECTION:
+                raise ValueError(f"At most {PRICE_STREAM_MAX_SYMBOLS_PER_CONNECTION} symbols per connection")
+            topic = self._topics.get(symbol)
+            if topic is None:
+                if len(self._topics) >= PRICE_STREAM_MAX_SYMBOLS:
+                    raise ValueError("Too many symbols are being streamed; try again later")
+                topic = self._topics[symbol] = _Topic()
+                topic.task = asyncio.create_task(self._refresh_loop(symbol, topic))
+            topic.subscribers.add(subscription)
+            subscription.symbols.add(symbol)
+            added.add(symbol)
+            # New subscribers get the last known quote right away instead of waiting a full interval
+            if topic.last is not None:
+                subscription.push(symbol, topic.last)
+        return added
+
+    def unsubscribe(self, subscription: Subscription, symbols: Optional[Iterable[str]] = None) -> None:
+        """Remove symbols (all of them by default); a symbol's loop stops with its last subscriber."""
+        for symbol in list(subscription.symbols if symbols is None else (s.upper() for s in symbols)):
+            subscription.symbols.discard(symbol)
+            topic = self._topics.get(symbol)
+            if topic is None:
+                continue
+            topic.subscribers.discard(subscription)
+            if not topic.subscribers:
+                topic.task.cancel()
+                del self._topics[symbol]
+
+    def _cached_quote(self, symbol: str) -> Optional[Any]:
+        quote_cache = self.av_service.quote_cache
+        quote = quote_cache.get(symbol)
+        if quote is None:
+            last_known = quote_cache.get_stale(symbol)
+            # No age field: it changes every tick and would defeat the unchanged-quote check
+            quote = {**last_known[0], "stale": True} if last_known else None
+        return quote
+
+    async def _refresh_loop(self, symbol: str, topic: _Topic) -> None:
+        while True:
+            try:
+                # Quotes fetched for other requests are reused; only an expired one is refreshed,
+                # and only from idle budget (Priority.WARMING)
+                if self.av_service.quote_cache.get(symbol) is None:
+                    await self.av_service.warm_stock_quote(symbol)
+                quote = self._cached_quote(symbol)
+                if quote is not None and quote != topic.last:
+                    topic.last = quote
+                    self.published += 1
+                    for subscription in topic.subscribers:
+                        subscription.push(symbol, quote)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Price stream refresh failed for %s: %s", symbol, e)
+            await asyncio.sleep(self.interval)
+
+    async def close(self) -> None:
+        tasks = [topic.task for topic in self._topics.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._topics.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        subscriptions = {s for topic in self._topics.values() for s in topic.subscribers}
+        return {
+            "symbols": len(self._topics),
+            "subscriptions": len(subscriptions),
+            "symbol_subscriptions": sum(len(topic.subscribers) for topic in self._topics.values()),
+            "published": self.published,
+            "coalesced": sum(s.coalesced for s in subscriptions),
+            "interval_seconds": self.interval,
+        }
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import os
+from sqlalchemy import func, select
+from app.core.database import async_session
+from app.models import PortfolioStock
+from app.services.alpha_vantage_service import AlphaVantageService
+
+logger = logging.getLogger(__name__)
+
+WARM_INTERVAL_SECONDS = float(os.getenv("QUOTE_WARM_INTERVAL_SECONDS", "5"))
+WARM_TOP_SYMBOLS = int(os.getenv("QUOTE_WARM_TOP_SYMBOLS", "50"))
+# Only re-warm quotes that are about to expire
+WARM_WHEN_TTL_BELOW_SECONDS = float(os.getenv("QUOTE_WARM_WHEN_TTL_BELOW_SECONDS", "5"))
+
+
+async def get_most_held_symbols(db, limit: int = WARM_TOP_SYMBOLS):
+    stmt = (
+        select(PortfolioStock.symbol, func.count(func.distinct(PortfolioStock.user_id)).label("holders"))
+        .group_by(PortfolioStock.symbol)
+        .order_by(func.count(func.distinct(PortfolioStock.user_id)).desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [row.symbol.upper() for row in result.all() if row.symbol]
+
+
+async def run_quote_warmer(av_service: AlphaVantageService, interval: float = WARM_INTERVAL_SECONDS):
+    """
+    Background task: spend idle rate budget keeping the most widely held
+    symbols fresh in the quote cache, most held first.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                symbols = await get_most_held_symbols(db)
+            for symbol in symbols:
+                if av_service.quote_cache.ttl_remaining(symbol) > WARM_WHEN_TTL_BELOW_SECONDS:
+                    continue
+                if not await av_service.warm_stock_quote(symbol):
+                    # No spare budget right now; try again next round
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Quote warmer error: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,164 @@
+from enum import IntEnum
+from typing import Optional
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+
+# Alpha Vantage quota; defaults match the free tier
+CALLS_PER_MINUTE = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", "5"))
+CALLS_PER_DAY = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_DAY", "25"))
+# How long an interactive request may queue for budget before we give up and serve the last known value
+INTERACTIVE_MAX_WAIT_SECONDS = float(os.getenv("ALPHA_VANTAGE_INTERACTIVE_MAX_WAIT_SECONDS", "2"))
+INGESTION_MAX_WAIT_SECONDS = float(os.getenv("ALPHA_VANTAGE_INGESTION_MAX_WAIT_SECONDS", "120"))
+# Tokens per minute kept back from background warming so interactive users are never starved
+WARMING_RESERVE = int(os.getenv("ALPHA_VANTAGE_WARMING_RESERVE", "2"))
+# Share of the daily quota warming may never touch, kept for interactive requests and ingestion
+WARMING_DAILY_RESERVE_FRACTION = float(os.getenv("ALPHA_VANTAGE_WARMING_DAILY_RESERVE_FRACTION", "0.6"))
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    INGESTION = 1
+    WARMING = 2
+
+
+class BudgetExhausted(Exception):
+    """Raised when the upstream quota cannot serve a request in time."""
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def consume(self, n: float = 1) -> None:
+        self._refill()
+        self.tokens -= n
+
+    def drain(self) -> None:
+        self._refill()
+        self.tokens = min(self.tokens, 0)
+
+    def seconds_until(self, n: float = 1) -> float:
+        missing = n - self.available()
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second
+
+
+class UpstreamScheduler:
+    """
+    Hands out upstream call slots from a per-minute and a per-day token bucket.
+    Waiters are served strictly by priority (interactive, then ingestion, then
+    warming), FIFO within a priority.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int = CALLS_PER_MINUTE,
+        calls_per_day: int = CALLS_PER_DAY,
+        warming_day_reserve_fraction: float = WARMING_DAILY_RESERVE_FRACTION,
+    ):
+        self.minute_bucket = TokenBucket(calls_per_minute, calls_per_minute / 60)
+        self.day_bucket = TokenBucket(calls_per_day, calls_per_day / 86400)
+        self.warming_day_reserve = math.ceil(calls_per_day * warming_day_reserve_fraction)
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.granted = {p.name.lower(): 0 for p in Priority}
+        self.rejected = {p.name.lower(): 0 for p in Priority}
+
+    def remaining(self) -> dict:
+        return {
+            "minute": round(self.minute_bucket.available(), 2),
+            "day": round(self.day_bucket.available(), 2),
+            "queued": sum(1 for *_, fut in self._waiters if not fut.done()),
+        }
+
+    def stats(self) -> dict:
+        return {"remaining": self.remaining(), "granted": dict(self.granted), "rejected": dict(self.rejected)}
+
+    def _has_budget(self) -> bool:
+        return self.minute_bucket.available() >= 1 and self.day_bucket.available() >= 1
+
+    def _consume(self, priority: Priority) -> None:
+        self.minute_bucket.consume()
+        self.day_bucket.consume()
+        self.granted[priority.name.lower()] += 1
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE, max_wait: Optional[float] = None) -> None:
+        """Wait for an upstream slot. Raises BudgetExhausted if none is granted within max_wait."""
+        if max_wait is None:
+            max_wait = INTERACTIVE_MAX_WAIT_SECONDS if priority == Priority.INTERACTIVE else INGESTION_MAX_WAIT_SECONDS
+        if self.day_bucket.seconds_until() > max_wait:
+            self.rejected[priority.name.lower()] += 1
+            raise BudgetExhausted("Daily Alpha Vantage budget exhausted")
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), fut))
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(fut, max_wait)
+        except asyncio.TimeoutError:
+            self.rejected[priority.name.lower()] += 1
+            raise BudgetExhausted("Alpha Vantage rate budget exhausted")
+
+    def try_acquire_idle(self, reserve: int = WARMING_RESERVE) -> bool:
+        """
+        Grant a warming slot only if nobody is queued and spare budget is left above
+        the reserves: `reserve` calls per minute and `warming_day_reserve` per day.
+        """
+        if any(not fut.done() for *_, fut in self._waiters):
+            return False
+        if self.minute_bucket.available() < 1 + reserve or self.day_bucket.available() < 1 + self.warming_day_reserve:
+            return False
+        self._consume(Priority.WARMING)
+        return True
+
+    def mark_exhausted(self) -> None:
+        """Upstream told us we're over quota; stop spending until the minute bucket refills."""
+        self.minute_bucket.drain()
+
+    def _ensure_dispatcher(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while True:
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if self._has_budget():
+                priority, _, fut = heapq.heappop(self._waiters)
+                self._consume(Priority(priority))
+                fut.set_result(None)
+                continue
+
+            delay = max(self.minute_bucket.seconds_until(), self.day_bucket.seconds_until())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,129 @@
+import itertools
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.core.metrics import register_cache
+from app.services.alpha_vantage_service import QuoteCache, quote_cache
+
+# Upper bound on how long a cached response can outlive a write made by another worker process;
+# responses built from quotes are also dropped as soon as any of those quotes is refreshed
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+
+# Per-user cached routes, dropped together when the user's holdings or cash change
+USER_SCOPED_KEYS = ("portfolio", "portfolio_summary", "portfolio_cash")
+
+response_cache = QuoteCache(ttl=RESPONSE_CACHE_TTL_SECONDS, max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+register_cache("response", response_cache)
+
+# Bumped on every write to a user's holdings or cash; entries built under an older version are stale.
+# Ordered by bump time as {user_id: (version, bumped_at)} and pruned once no fresh entry uses it.
+_user_versions: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+
+# ETags are "<process>.<revision>": the revision changes whenever a key's body changes in this
+# process, and the process tag keeps another worker or a restart from ever reissuing one
+_PROCESS_TAG = uuid.uuid4().hex[:12]
+_revisions = itertools.count(1)
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, version: int, quote_stamps: Dict[str, Optional[float]], etag: str):
+        self.body = body
+        self.etag = etag
+        self.version = version
+        # When each quote the body was built from was fetched; a refreshed quote invalidates the body
+        self.quote_stamps = quote_stamps
+
+    @property
+    def cacheable(self) -> bool:
+        # A missing stamp means a failed or stale quote; recompute next time rather than pin it
+        return all(stamp is not None for stamp in self.quote_stamps.values())
+
+    def is_current(self, version: int) -> bool:
+        return self.version == version and all(
+            quote_cache.stored_at(symbol) == stamp for symbol, stamp in self.quote_stamps.items()
+        )
+
+
+def user_version(user_id: int) -> int:
+    entry = _user_versions.get(user_id)
+    return entry[0] if entry else 0
+
+
+def _prune_user_versions() -> None:
+    """
+    Forget versions bumped over a TTL ago whose user has no fresh cached response left.
+    The version only has to differ from those of live entries, so restarting at 0 is safe.
+    """
+    cutoff = time.monotonic() - RESPONSE_CACHE_TTL_SECONDS
+    for _ in range(len(_user_versions)):
+        user_id, (version, bumped_at) = next(iter(_user_versions.items()))
+        if bumped_at > cutoff:
+            break
+        if any(response_cache.get(f"{key}:{user_id}") is not None for key in USER_SCOPED_KEYS):
+            _user_versions[user_id] = (version, time.monotonic())
+            _user_versions.move_to_end(user_id)
+        else:
+            del _user_versions[user_id]
+
+
+def invalidate_user_responses(user_id: int) -> None:
+    """Call after any write to the user's holdings or cash."""
+    _prune_user_versions()
+    _user_versions[user_id] = (user_version(user_id) + 1, time.monotonic())
+    _user_versions.move_to_end(user_id)
+    for key in USER_SCOPED_KEYS:
+        response_cache.invalidate(f"{key}:{user_id}")
+
+
+def _etag_for(key: str, body: bytes) -> str:
+    # A rebuilt body identical to the last one keeps its ETag, so clients still get 304s
+    previous = response_cache.get_stale(key)
+    if previous is not None and previous[0].body == body:
+        return previous[0].etag
+    return f'"{_PROCESS_TAG}.{next(_revisions)}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+async def cached_json_response(
+    request: Request,
+    key: str,
+    compute: Callable[[], Awaitable[Tuple[Any, Iterable[str]]]],
+    version: int = 0,
+    private: bool = True,
+) -> Response:
+    """
+    Serve a JSON body from the response cache, recomputing it only when the
+    version or any quote it was built from has changed. compute returns the
+    payload and the symbols whose quotes it used. Answers 304 when the
+    client's If-None-Match already has the current body.
+    """
+    entry = response_cache.get(key)
+    if entry is not None and entry.is_current(version):
+        response_cache.hits += 1
+    else:
+        response_cache.misses += 1
+        payload, symbols = await compute()
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+        stamps = {symbol: quote_cache.stored_at(symbol) for symbol in symbols}
+        entry = CachedResponse(body, version, stamps, _etag_for(key, body))
+        if entry.cacheable:
+            response_cache.set(key, entry)
+
+    # no-cache: the browser keeps the body but must revalidate on every poll
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache" if private else "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,62 @@
+import os
+from datetime import datetime
+from typing import Iterable, Optional
+import numpy as np
+from app.core.crud import upsert_trading_signals
+from app.services.backtest import rolling_mean
+from app.services.price_cache import load_prices
+
+SIGNAL_SHORT_WINDOW = int(os.getenv("SIGNAL_SHORT_WINDOW", "20"))
+SIGNAL_LONG_WINDOW = int(os.getenv("SIGNAL_LONG_WINDOW", "50"))
+# A cross this many bars old or newer is reported as BUY/SELL; older ones as HOLD
+SIGNAL_RECENT_CROSS_BARS = int(os.getenv("SIGNAL_RECENT_CROSS_BARS", "5"))
+
+
+def compute_signal(
+    dates: np.ndarray,
+    closes: np.ndarray,
+    short_window: int = SIGNAL_SHORT_WINDOW,
+    long_window: int = SIGNAL_LONG_WINDOW,
+) -> Optional[dict]:
+    """Latest SMA crossover signal for one series, or None if the long SMA never fills."""
+    if len(closes) < long_window:
+        return None
+    cumsum = np.concatenate(([0.0], np.cumsum(closes, dtype=np.float64)))
+    short_sma = rolling_mean(closes, short_window, cumsum)[long_window - 1:]
+    long_sma = rolling_mean(closes, long_window, cumsum)[long_window - 1:]
+
+    above = short_sma > long_sma
+    crosses = np.flatnonzero(above[1:] != above[:-1])
+    bars_since_cross = len(above) - 2 - int(crosses[-1]) if len(crosses) else None
+    bullish = bool(above[-1])
+    if bars_since_cross is not None and bars_since_cross < SIGNAL_RECENT_CROSS_BARS:
+        signal = "BUY" if bullish else "SELL"
+    else:
+        signal = "HOLD"
+
+    return {
+        "as_of": dates[-1].item(),
+        "close": float(closes[-1]),
+        "short_window": short_window,
+        "long_window": long_window,
+        "sma_short": float(short_sma[-1]),
+        "sma_long": float(long_sma[-1]),
+        "state": "bullish" if bullish else "bearish",
+        "signal": signal,
+        "bars_since_cross": bars_since_cross,
+        "strength": float((short_sma[-1] - long_sma[-1]) / long_sma[-1] * 100),
+    }
+
+
+async def refresh_signals(db, symbols: Iterable[str]) -> int:
+    """Recompute and upsert the materialized signal row for each symbol. Returns rows written."""
+    rows = []
+    updated_at = datetime.utcnow()
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        series = await load_prices(db, symbol)
+        if series is None:
+            continue
+        signal = compute_signal(*series)
+        if signal is not None:
+            rows.append({"symbol": symbol, "updated_at": updated_at, **signal})
+    return await upsert_trading_signals(db, rows)
@@ -0,0 +1,178 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Callable, List, Optional
+import numpy as np
+from app.services.backtest import TRADING_DAYS_PER_YEAR
+from app.services.price_cache import PriceCache, price_cache, sync_symbol
+
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", str(os.cpu_count() or 1)))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_sweep_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=SWEEP_WORKERS)
+    return _executor
+
+
+def shutdown_sweep_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def window_matrix(closes: np.ndarray, windows: np.ndarray, cumsum: np.ndarray) -> np.ndarray:
+    """SMA for every window as rows of one (len(windows), n) matrix, all from the same cumsum."""
+    n = len(closes)
+    out = np.full((len(windows), n), np.nan)
+    t = np.arange(n)
+    for row, w in enumerate(windows):
+        valid = t >= w - 1
+        out[row, valid] = (cumsum[t[valid] + 1] - cumsum[t[valid] + 1 - w]) / w
+    return out
+
+
+def sweep_series(closes: np.ndarray, short_windows: np.ndarray, long_windows: np.ndarray, commission: float = 0.0):
+    """
+    Sharpe and total return for every (short, long) pair on one series.
+    Returns two (len(short_windows), len(long_windows)) matrices; pairs with
+    short >= long are NaN.
+
+    Positions are 0/1, so each pair's sum of returns, sum of squared returns
+    and sum of log returns are dot products of its position row with
+    per-bar vectors. One short window is scored against all long windows per
+    matrix product.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
+    sharpe = np.full((len(short_windows), len(long_windows)), np.nan)
+    total = np.full_like(sharpe, np.nan)
+    if n < 2:
+        return sharpe, total
+
+    cumsum = np.concatenate(([0.0], np.cumsum(closes)))
+    short_sma = window_matrix(closes, short_windows, cumsum)
+    long_sma = window_matrix(closes, long_windows, cumsum)
+    asset_returns = np.zeros(n)
+    asset_returns[1:] = closes[1:] / closes[:-1] - 1.0
+    # per-bar vectors the position rows are multiplied against
+    bar_vectors = np.stack([asset_returns, asset_returns ** 2, np.log1p(asset_returns)], axis=1)
+    entry_vectors = np.stack([asset_returns, np.log1p(asset_returns - commission)], axis=1)
+    samples = n - 1  # bar 0 has no return
+
+    for i, s in enumerate(short_windows):
+        cols = long_windows > s
+        if not cols.any():
+            continue
+        # NaN compares False, so pairs are flat until both SMAs exist
+        signal = short_sma[i] > long_sma[cols]
+        positions = np.zeros_like(signal)
+        positions[:, 1:] = signal[:, :-1]
+
+        sum_r, sum_r2, sum_log = (positions.astype(np.float64) @ bar_vectors).T
+        if commission:
+            changed = np.zeros_like(positions)
+            changed[:, 1:] = positions[:, 1:] != positions[:, :-1]
+            entries = (changed & positions).astype(np.float64)
+            turns = changed.sum(axis=1)
+            exits = turns - entries.sum(axis=1)
+            entry_r, entry_log = (entries @ entry_vectors).T
+            # every turn bar pays commission once; entry bars also carry that bar's return
+            sum_r2 = sum_r2 - 2 * commission * entry_r + commission ** 2 * turns
+            sum_r = sum_r - commission * turns
+            sum_log = sum_log - (entries @ bar_vectors[:, 2]) + entry_log + exits * np.log1p(-commission)
+
+        mean = sum_r / samples
+        std = np.sqrt(np.maximum(sum_r2 / samples - mean ** 2, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe[i, cols] = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS_PER_YEAR), 0.0)
+        total[i, cols] = np.expm1(sum_log) * 100
+    return sharpe, total
+
+
+def sweep_cached_symbol(cache_root: str, symbol: str, start: Optional[date], end: Optional[date],
+                        short_windows: np.ndarray, long_windows: np.ndarray, commission: float):
+    """Process-pool entry point: maps the symbol's cached columns in the worker, so no prices are pickled."""
+    series = PriceCache(cache_root).load(symbol, start, end)
+    if series is None or len(series[1]) <= long_windows.min():
+        return None
+    return sweep_series(series[1], short_windows, long_windows, commission)
+
+
+async def run_sweep(
+    db,
+    symbols: List[str],
+    short_windows: np.ndarray,
+    long_windows: np.ndarray,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    commission: float = 0.0,
+    metric: str = "sharpe",
+    top_n: int = 20,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """
+    Evaluate the whole short x long grid for every symbol across the process
+    pool and average each pair's metrics over the symbols that had data.
+    on_progress(done, total) is called as each symbol finishes.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    for symbol in symbols:
+        if not price_cache.has(symbol):
+            await sync_symbol(db, price_cache, symbol, rebuild=True)
+
+    loop = asyncio.get_running_loop()
+    executor = get_sweep_executor()
+    done = 0
+
+    async def run(symbol):
+        nonlocal done
+        result = await loop.run_in_executor(
+            executor, sweep_cached_symbol, price_cache.root, symbol, start, end, short_windows, long_windows, commission
+        )
+        done += 1
+        if on_progress:
+            on_progress(done, len(symbols))
+        return result
+
+    results = await asyncio.gather(*(run(symbol) for symbol in symbols))
+
+    evaluated = [symbol for symbol, r in zip(symbols, results) if r is not None]
+    results = [r for r in results if r is not None]
+    if not results:
+        raise ValueError("Not enough stored price history for any requested symbol")
+
+    with np.errstate(all="ignore"):
+        sharpe = np.nanmean(np.stack([r[0] for r in results]), axis=0)
+        total = np.nanmean(np.stack([r[1] for r in results]), axis=0)
+
+    ranked_by = sharpe if metric == "sharpe" else total
+    order = np.argsort(np.where(np.isnan(ranked_by), -np.inf, ranked_by), axis=None)[::-1]
+    ranked = []
+    for flat in order[:top_n]:
+        i, j = np.unravel_index(flat, ranked_by.shape)
+        if np.isnan(ranked_by[i, j]):
+            break
+        ranked.append({
+            "short_window": int(short_windows[i]),
+            "long_window": int(long_windows[j]),
+            "sharpeRatio": round(float(sharpe[i, j]), 3),
+            "totalReturn": round(float(total[i, j]), 2),
+        })
+
+    heatmap = np.round(ranked_by, 3)
+    return {
+        "symbols": evaluated,
+        "metric": metric,
+        "ranked": ranked,
+        "heatmap": {
+            "short_windows": short_windows.tolist(),
+            "long_windows": long_windows.tolist(),
+            "values": [[None if np.isnan(v) else float(v) for v in row] for row in heatmap],
+        },
+    }
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from collections import deque
+from datetime import date, timedelta
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Local stand-in for https://www.alphavantage.co/query used by the load tests.
+# Run: uvicorn benchmarks.alpha_vantage_stub:app --port 8099
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "80"))
+STUB_JITTER_MS = float(os.getenv("STUB_JITTER_MS", "40"))
+# Fraction of requests answered with HTTP 503
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+# Calls per rolling minute before answering with the real API's quota "Note" (0 = unlimited)
+STUB_CALLS_PER_MINUTE = int(os.getenv("STUB_CALLS_PER_MINUTE", "0"))
+
+app = FastAPI()
+_calls = deque()
+counters = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+
+def _base_price(symbol: str) -> float:
+    # Stable per-symbol price so repeated runs see the same portfolio values
+    return 20 + int(hashlib.md5(symbol.encode()).hexdigest()[:6], 16) % 480
+
+
+def _rate_limited() -> bool:
+    if not STUB_CALLS_PER_MINUTE:
+        return False
+    now = time.monotonic()
+    while _calls and now - _calls[0] > 60:
+        _calls.popleft()
+    if len(_calls) >= STUB_CALLS_PER_MINUTE:
+        return True
+    _calls.append(now)
+    return False
+
+
+def _global_quote(symbol: str) -> dict:
+    base = _base_price(symbol)
+    change = round(random.uniform(-0.03, 0.03) * base, 4)
+    return {"Global Quote": {
+        "01. symbol": symbol,
+        "05. price": f"{base + change:.4f}",
+        "09. change": f"{change:.4f}",
+        "10. change percent": f"{change / base * 100:.4f}%",
+    }}
+
+
+def _overview(symbol: str) -> dict:
+    return {
+        "Symbol": symbol,
+        "Name": f"{symbol} Holdings Inc",
+        "Exchange": "NASDAQ",
+        "Sector": "TECHNOLOGY",
+        "Industry": "SOFTWARE",
+        "Currency": "USD",
+    }
+
+
+def _daily_adjusted(symbol: str, outputsize: str) -> dict:
+    bars = 100 if outputsize == "compact" else 5000
+    rng = random.Random(symbol)
+    price = _base_price(symbol)
+    series = {}
+    day = date.today()
+    while len(series) < bars:
+        day -= timedelta(days=1)
+        if day.weekday() >= 5:
+            continue
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.015)
+        series[day.isoformat()] = {
+            "1. open": f"{open_:.4f}",
+            "2. high": f"{max(open_, price) * (1 + abs(rng.gauss(0, 0.005))):.4f}",
+            "3. low": f"{min(open_, price) * (1 - abs(rng.gauss(0, 0.005))):.4f}",
+            "4. close": f"{price:.4f}",
+            "5. adjusted close": f"{price:.4f}",
+            "6. volume": str(rng.randint(100_000, 50_000_000)),
+            "7. dividend amount": "0.0000",
+            "8. split coefficient": "1.0",
+        }
+    return {"Meta Data": {"2. Symbol": symbol}, "Time Series (Daily)": series}
+
+
+@app.get("/query")
+async def query(request: Request):
+    params = request.query_params
+    counters["requests"] += 1
+    await asyncio.sleep(max(0.0, random.gauss(STUB_LATENCY_MS, STUB_JITTER_MS / 2)) / 1000)
+
+    if STUB_ERROR_RATE and random.random() < STUB_ERROR_RATE:
+        counters["errors"] += 1
+        return JSONResponse({"error": "stub injected failure"}, status_code=503)
+    if _rate_limited():
+        counters["rate_limited"] += 1
+        return {"Note": "Thank you for using Alpha Vantage! Our standard API rate limit is exceeded."}
+
+    symbol = params.get("symbol", "").upper()
+    function = params.get("function")
+    if function == "GLOBAL_QUOTE":
+        return _global_quote(symbol)
+    if function == "OVERVIEW":
+        return _overview(symbol)
+    if function == "TIME_SERIES_DAILY_ADJUSTED":
+        return _daily_adjusted(symbol, params.get("outputsize", "compact"))
+    return {"Error Message": f"Invalid API call: unknown function {function}"}
+
+
+@app.get("/stats")
+async def stats():
+    return counters
@@ -0,0 +1,108 @@
+import os
+import sys
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+
+# Compares a login storm with bcrypt run inline on the event loop (the old behaviour)
+# against the bounded executor, while a probe measures how late a cheap non-auth
+# request gets scheduled:
+#
+#   python -m benchmarks.password_hashing --logins 200
+#
+# Results go to benchmarks/results/.
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+sys.path.insert(0, BACKEND_DIR)
+from app.core import passwords
+
+PROBE_INTERVAL_SECONDS = 0.005
+
+
+async def probe(latencies: list, stop: asyncio.Event):
+    # A non-auth request is only as fast as the event loop lets it start
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+        lag = time.perf_counter() - scheduled - PROBE_INTERVAL_SECONDS
+        latencies.append(max(lag, 0.0) * 1000)
+        # Requests that would have arrived while the loop was blocked waited too
+        # (coordinated omission), so record one sample per missed probe tick
+        lag -= PROBE_INTERVAL_SECONDS
+        while lag > 0:
+            latencies.append(lag * 1000)
+            lag -= PROBE_INTERVAL_SECONDS
+
+
+async def storm(mode: str, logins: int, concurrency: int, stored_hash: str) -> dict:
+    async def login_inline():
+        return passwords.verify_password_sync("correct horse", stored_hash)
+
+    async def login_executor():
+        valid, _ = await passwords.verify_password("correct horse", stored_hash)
+        return valid
+
+    login = login_inline if mode == "inline" else login_executor
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            assert await login()
+
+    latencies, stop = [], asyncio.Event()
+    prober = asyncio.create_task(probe(latencies, stop))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    if logins:
+        await asyncio.gather(*(one() for _ in range(logins)))
+    else:
+        await asyncio.sleep(1.0)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "logins_per_second": round(logins / elapsed, 1),
+        "probe_p50_ms": round(statistics.median(latencies), 2),
+        "probe_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "probe_max_ms": round(latencies[-1], 2),
+    }
+
+
+async def main(args) -> None:
+    stored_hash = passwords.hash_password_sync("correct horse")
+    print(f"bcrypt cost {passwords.BCRYPT_ROUNDS}, {passwords.PASSWORD_HASH_WORKERS} hash workers, "
+          f"{args.logins} logins at concurrency {args.concurrency}")
+    runs = []
+    for mode, n in (("idle", 0), ("inline", args.logins), ("executor", args.logins)):
+        runs.append(await storm(mode, n, args.concurrency, stored_hash))
+        print(runs[-1])
+    passwords.shutdown_password_executor()
+
+    output = args.output or os.path.join(RESULTS_DIR, "password-hashing-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "bcrypt_rounds": passwords.BCRYPT_ROUNDS, "hash_workers": passwords.PASSWORD_HASH_WORKERS,
+                "logins": args.logins, "concurrency": args.concurrency,
+            },
+            "runs": runs,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login storm vs. non-auth latency benchmark")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/password-hashing-<timestamp>.json)")
+    asyncio.run(main(parser.parse_args()))
@@ -1,20 +1,82 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db, Base, engine # Ensure Base and engine are imported
+from app.core.db_instrumentation import DbInstrumentationMiddleware, pool_stats, register_db_metrics, totals as db_totals
+from app.core.logging_config import configure_logging
+from app.core.metrics import MetricsMiddleware, monitor_event_loop_lag, registry as metrics_registry
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.core import crud
+from app.core.passwords import PasswordHasherBusy, shutdown_password_executor
 from app.api.routes.auth import router as auth_router
 from app.api.routes.portfolio import router as portfolio_router
 from app.api.routes import stocks
+from app.api.routes.backtest import router as backtest_router
+from app.api.routes.indicators import router as indicators_router
+from app.api.routes.signals import router as signals_router
+from app.api.routes.prices import router as prices_router
+from app.services.alpha_vantage_service import AlphaVantageService, create_http_client
+from app.services.price_ingestion import refresh_ingestion_metrics
+from app.services.price_stream import PriceHub
+from app.services.quote_warming import run_quote_warmer
+from app.services.sweep import shutdown_sweep_executor
+
+configure_logging()
+logger = logging.getLogger(__name__)
+register_db_metrics(engine)
 
 # No explicit need for sqlalchemy.schema.CreateTable unless you're explicitly using it in a startup script
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting up")
+    # Optional: If you are NOT using Alembic for migrations, you can uncomment the following lines
+    # to create tables when the app starts. If you ARE using Alembic, keep this commented out
+    # to avoid conflicts.
+    # async with engine.begin() as conn:
+    #     await conn.run_sync(Base.metadata.create_all)
+
+    # One pooled, keep-alive client for all upstream market data, shared via app.state
+    http_client = create_http_client()
+    app.state.alpha_vantage_service = AlphaVantageService(client=http_client)
+    # One refresh loop per streamed symbol, shared by every /ws/prices client
+    app.state.price_hub = PriceHub(app.state.alpha_vantage_service)
+    # Spend idle rate budget keeping popular quotes warm
+    warmer = asyncio.create_task(run_quote_warmer(app.state.alpha_vantage_service))
+    loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    logger.info("Startup tasks completed")
+    try:
+        yield
+    finally:
+        logger.info("Shutting down")
+        warmer.cancel()
+        loop_lag_monitor.cancel()
+        await asyncio.gather(warmer, loop_lag_monitor, return_exceptions=True)
+        await app.state.price_hub.close()
+        await http_client.aclose()
+        shutdown_sweep_executor()
+        shutdown_password_executor()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Password hashing is bounded; shed sign-in load instead of queueing without limit
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 app.include_router(auth_router)
 app.include_router(portfolio_router)
 app.include_router(stocks.router)
+app.include_router(backtest_router)
+app.include_router(indicators_router)
+app.include_router(signals_router)
+app.include_router(prices_router)
 
 # Define allowed origins for CORS
 origins = [
@@ -42,31 +104,41 @@ app.add_middleware(
 # The CORSMiddleware should handle OPTIONS requests.
 # Removing explicit routes to see if they were causing conflict.
 
-@app.on_event("startup")
-async def startup():
-    print("INFO: Starting up, DB engine ready.")
-    # Optional: If you are NOT using Alembic for migrations, you can uncomment the following lines
-    # to create tables when the app starts. If you ARE using Alembic, keep this commented out
-    # to avoid conflicts.
-    # async with engine.begin() as conn:
-    #     await conn.run_sync(Base.metadata.create_all)
-    print("INFO: Database startup tasks completed.")
-
-
-@app.on_event("shutdown")
-async def shutdown():
-    print("INFO: Shutting down.")
+# Per-request query count, DB time and N+1 warnings
+app.add_middleware(DbInstrumentationMiddleware)
+# Outermost, so route latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 async def root():
     return {"message": "Bullseye backend running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(db: AsyncSession = Depends(get_db)):
+    try:
+        await refresh_ingestion_metrics(db)
+    except Exception as e:
+        # Serve the rest of the metrics even when the database is unreachable
+        logger.warning("Could not load ingestion metrics: %s", e)
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/db/stats")
+async def get_db_stats():
+    return {
+        "pool": pool_stats(engine),
+        "requests": db_totals["requests"],
+        "queries": db_totals["queries"],
+        "db_seconds": round(db_totals["db_seconds"], 3),
+        "pool_wait_seconds": round(db_totals["pool_wait_seconds"], 3),
+        "repeated_statement_warnings": db_totals["repeated_statement_warnings"],
+    }
+
 @app.post("/signup", response_model=UserResponse)
 async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    print(f"DEBUG: Received signup request for email: {user.email}")
     existing_user = await crud.get_user_by_email(db, user.email)
     if existing_user:
-        print(f"DEBUG: Email {user.email} already registered.")
+        logger.debug("Signup rejected: email already registered")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -74,22 +146,20 @@ async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
     
     # FIX: Corrected to user.confirmPassword (camelCase) as defined in schema
     if user.password != user.confirmPassword: 
-        print("DEBUG: Passwords do not match.")
+        logger.debug("Signup rejected: passwords do not match")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Passwords do not match"
         )
     
-    print(f"DEBUG: Creating new user for email: {user.email}")
     try:
         new_user = await crud.create_user(db, user)
-        print(f"DEBUG: User creation successful for ID: {new_user.id}")
         return new_user
     except HTTPException as e: # Catch HTTPException from crud.create_user (e.g., if re-raised commit error)
-        print(f"ERROR: Caught HTTPException during user creation: {e.detail}")
+        logger.error("User creation failed: %s", e.detail)
         raise e
     except Exception as e: # Catch any other unexpected errors during user creation
-        print(f"ERROR: Unexpected error during user creation: {e}")
+        logger.exception("Unexpected error during user creation")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred during user creation: {e}"
@@ -98,16 +168,15 @@ async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @app.post("/login", response_model=UserResponse)
 async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
-    print(f"DEBUG: Received login request for email: {user.email}")
     db_user = await crud.get_user_by_email(db, user.email)
     if not db_user:
-        print(f"DEBUG: User not found for email: {user.email}")
+        logger.debug("Login rejected: unknown email")
         raise HTTPException(status_code=404, detail="User not found")
     
-    if not crud.verify_password(user.password, db_user.hashed_password):
-        print(f"DEBUG: Incorrect password for email: {user.email}")
+    if not await crud.authenticate_user(db, db_user, user.password):
+        logger.debug("Login rejected: incorrect password", extra={"user_id": db_user.id})
         raise HTTPException(status_code=401, detail="Incorrect password")
     
-    print(f"DEBUG: Login successful for user: {db_user.email}")
+    logger.debug("Login succeeded", extra={"user_id": db_user.id})
     return db_user
 
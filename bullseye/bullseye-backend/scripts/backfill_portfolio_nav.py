@@ -0,0 +1,31 @@
+import os
+import sys
+import argparse
+import asyncio
+from datetime import date
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to the Python path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import async_session
+from app.core.logging_config import configure_logging
+from app.services.portfolio_nav import backfill_portfolio_nav
+
+# fetch_daily_prices.py appends new days nightly; run this once to build history,
+# or again for a range after a price backfill. Rows are upserted, so re-runs are safe.
+
+async def main(start, end):
+    async with async_session() as db:
+        written = await backfill_portfolio_nav(db, start, end)
+    print(f"Materialized {written} portfolio NAV rows.")
+
+if __name__ == "__main__":
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Backfill portfolio_nav_daily")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day (default: earliest stored close)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day (default: latest stored close)")
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end))
@@ -0,0 +1,30 @@
+import os
+import sys
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to the Python path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import async_session
+from app.core.logging_config import configure_logging
+from app.services.alpha_vantage_service import AlphaVantageService, create_http_client
+from app.services.company_profile_service import refresh_company_profiles
+
+# Run periodically (e.g. weekly cron) to backfill and refresh company_profiles
+
+async def main():
+    http_client = create_http_client()
+    av_service = AlphaVantageService(client=http_client)
+    try:
+        async with async_session() as db:
+            written = await refresh_company_profiles(db, av_service)
+        print(f"Refreshed {written} company profiles.")
+    finally:
+        await http_client.aclose()
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+import os
+import sys
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the parent directory to the Python path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from app.core.database import async_session
+from app.core.logging_config import configure_logging
+from app.models import SymbolIngestionState
+from app.services.signals import refresh_signals
+
+# Ingestion keeps trading_signals current; run this once to backfill symbols ingested before it
+# existed, or after changing SIGNAL_SHORT_WINDOW / SIGNAL_LONG_WINDOW
+
+async def main():
+    async with async_session() as db:
+        symbols = (await db.execute(select(SymbolIngestionState.symbol))).scalars().all()
+        written = await refresh_signals(db, symbols)
+    print(f"Refreshed {written} trading signals.")
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(main())
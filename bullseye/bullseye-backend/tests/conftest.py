@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# Settings() requires these at import time. Tests that touch the database run against
+# TEST_DATABASE_URL only (it replaces DATABASE_URL, never the other way round) and drop
+# every table afterwards, so point it at a scratch Postgres database.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql+asyncpg://localhost/bullseye_test"
+os.environ["ALEMBIC_URL"] = os.environ["DATABASE_URL"].replace("+asyncpg", "+psycopg2")
+os.environ.setdefault("ALPHA_ADVANTAGE_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("PRICE_CACHE_DIR", tempfile.mkdtemp(prefix="bullseye-price-cache-"))
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def database_url():
+    if not TEST_DATABASE_URL:
+        pytest.skip("set TEST_DATABASE_URL to a scratch Postgres database (postgresql+asyncpg://...)")
+    return TEST_DATABASE_URL
@@ -0,0 +1,33 @@
+import asyncio
+import httpx
+from app.services.alpha_vantage_service import AlphaVantageService, QuoteCache
+
+
+def test_concurrent_batches_share_one_concurrency_cap():
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            service = AlphaVantageService(client=client, cache=QuoteCache(ttl=60), batch_concurrency=2)
+            service.quote_cache.set("CACHED", {"price": 1.0})
+            running, peak = 0, 0
+
+            async def get_stock_price(symbol):
+                nonlocal running, peak
+                if symbol == "CACHED":
+                    return service.quote_cache.get(symbol)
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+                return {"price": 2.0}
+
+            service.get_stock_price = get_stock_price
+            batches = await asyncio.gather(
+                service.get_stock_prices(["A", "B", "C"]),
+                service.get_stock_prices(["D", "E", "F"]),
+                service.get_stock_prices(["CACHED"]),
+            )
+            return batches, peak
+
+    batches, peak = asyncio.run(scenario())
+    assert peak == 2
+    assert batches[0] == {s: {"price": 2.0} for s in "ABC"} and batches[2] == {"CACHED": {"price": 1.0}}
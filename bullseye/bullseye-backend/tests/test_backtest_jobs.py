@@ -0,0 +1,52 @@
+import asyncio
+from app.services import backtest_jobs
+from app.services.backtest_jobs import BacktestJobManager
+
+
+class FakeSession:
+    def __init__(self):
+        self.lookups = 0
+
+    async def get(self, model, key):
+        self.lookups += 1
+        await asyncio.sleep(0.01)
+        return None
+
+
+class FakeCache:
+    def has(self, symbol):
+        return False
+
+    def version(self, symbol):
+        return (1, 1)
+
+
+def test_identical_concurrent_submissions_share_one_job(monkeypatch):
+    syncs, runs = [], []
+
+    async def fake_sync(db, cache, symbol, rebuild=False):
+        syncs.append(symbol)
+        await asyncio.sleep(0.01)
+
+    async def fake_run(self, job):
+        runs.append(job.id)
+        job.status = "done"
+
+    monkeypatch.setattr(backtest_jobs, "price_cache", FakeCache())
+    monkeypatch.setattr(backtest_jobs, "sync_symbol", fake_sync)
+    monkeypatch.setattr(BacktestJobManager, "_run", fake_run)
+
+    async def scenario():
+        manager, db = BacktestJobManager(), FakeSession()
+        params = {"symbol": "AAPL", "short_window": 20, "long_window": 50}
+        first, second = await asyncio.gather(
+            manager.submit(db, "backtest", params, ["AAPL"]),
+            manager.submit(db, "backtest", dict(params), ["AAPL"]),
+        )
+        await asyncio.gather(*manager._tasks)
+        return manager, db, first, second
+
+    manager, db, first, second = asyncio.run(scenario())
+    assert first is second
+    assert syncs == ["AAPL"] and db.lookups == 1 and runs == [first.id]
+    assert manager._pending == {}
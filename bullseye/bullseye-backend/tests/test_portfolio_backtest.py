@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from app.services.backtest import run_sma_crossover
+from app.services.portfolio_backtest import run_portfolio_crossover
+
+METRICS = ("totalReturn", "sharpeRatio", "maxDrawdown", "winRate", "totalTrades", "profitFactor")
+
+
+def random_walk(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2020-01-01") + np.arange(n)
+    return dates, 100 * np.cumprod(1 + rng.normal(0.0005, 0.02, n))
+
+
+def test_single_symbol_portfolio_matches_backtest():
+    dates, closes = random_walk(800)
+    single = run_sma_crossover(dates, closes, 10, 30, initial_capital=10000.0)
+    portfolio = run_portfolio_crossover(["X"], dates, closes[:, None], np.zeros(1), 10000.0, 10, 30)
+    assert {m: portfolio[m] for m in METRICS} == {m: single[m] for m in METRICS}
+    assert portfolio["performanceData"] == single["performanceData"]
+
+
+def test_single_symbol_portfolio_matches_backtest_with_commission():
+    dates, closes = random_walk(800)
+    single = run_sma_crossover(dates, closes, 10, 30, initial_capital=10000.0, commission=0.001)
+    portfolio = run_portfolio_crossover(["X"], dates, closes[:, None], np.zeros(1), 10000.0, 10, 30, commission=0.001)
+    assert portfolio["totalTrades"] == single["totalTrades"]
+    assert portfolio["winRate"] == single["winRate"]
+    # Periodic rebalances also trade away the commission debt, a second-order difference
+    assert portfolio["totalReturn"] == pytest.approx(single["totalReturn"], abs=0.1)
+
+
+def test_holdings_are_not_valued_before_their_first_price():
+    dates, closes = random_walk(300)
+    late = np.where(np.arange(300) < 100, np.nan, closes * 2)
+    result = run_portfolio_crossover(["X", "Y"], dates, np.column_stack([closes, late]), np.ones(2), 0.0, 10, 30)
+    # The run starts on Y's first bar, valued at that bar's closes rather than later ones
+    assert result["initialCapital"] == round(closes[100] * 3, 2)
+    assert result["performanceData"][0]["date"] == str(dates[100].astype("datetime64[M]"))
+
+
+def test_held_symbol_without_prices_is_rejected():
+    dates, closes = random_walk(100)
+    with pytest.raises(ValueError, match="Y"):
+        run_portfolio_crossover(["X", "Y"], dates, np.column_stack([closes, np.full(100, np.nan)]), np.ones(2), 0.0, 10, 30)
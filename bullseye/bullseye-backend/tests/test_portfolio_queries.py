@@ -0,0 +1,71 @@
+import asyncio
+from datetime import date, timedelta
+import httpx
+import pytest
+from app.api.dependencies import get_alpha_vantage_service
+from app.api.routes.auth import create_access_token
+from app.core.database import Base, async_session, engine
+from app.models import PortfolioStock, StockDailyPrice, User
+from main import app
+
+# Round-trips per request, whatever the number of holdings: /portfolio joins names onto
+# the holdings in one query; /portfolio/summary loads the user, the holdings and every
+# previous close (one DISTINCT ON query). Quotes come from the upstream batch, not the DB.
+PORTFOLIO_MAX_QUERIES = 1
+SUMMARY_MAX_QUERIES = 3
+
+
+class FakeAlphaVantage:
+    async def get_stock_prices(self, symbols):
+        return {symbol: {"price": 100.0, "change": 1.0, "percent_change": 1.0} for symbol in symbols}
+
+
+async def seed_user(db, user_id: int, holdings: int) -> None:
+    db.add(User(id=user_id, first_name="Test", last_name="User", email=f"user{user_id}@example.com",
+                hashed_password="x", cash_balance=1000.0))
+    await db.flush()
+    for i in range(holdings):
+        symbol = f"T{user_id}X{i}"
+        db.add(PortfolioStock(user_id=user_id, symbol=symbol, name=symbol, shares=10, purchase_price=90.0))
+        db.add_all(
+            StockDailyPrice(symbol=symbol, date=date.today() - timedelta(days=d), adjusted_close=95.0 + d)
+            for d in range(1, 6)
+        )
+    await db.commit()
+
+
+async def count_queries(client: httpx.AsyncClient, path: str, user_id: int) -> int:
+    response = await client.get(path, headers={"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"})
+    assert response.status_code == 200, response.text
+    # DbInstrumentationMiddleware reports the request's statement count in Server-Timing
+    timing = response.headers["server-timing"]
+    return int(timing.split('desc="')[1].split(" ")[0])
+
+
+async def run_scenario() -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    counts = {}
+    try:
+        async with async_session() as db:
+            await seed_user(db, 1, holdings=1)
+            await seed_user(db, 2, holdings=25)
+        app.dependency_overrides[get_alpha_vantage_service] = lambda: FakeAlphaVantage()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for user_id in (1, 2):
+                for path in ("/portfolio", "/portfolio/summary"):
+                    counts[path, user_id] = await count_queries(client, path, user_id)
+    finally:
+        app.dependency_overrides.pop(get_alpha_vantage_service, None)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+    return counts
+
+
+def test_portfolio_routes_issue_a_fixed_number_of_queries(database_url):
+    counts = asyncio.run(run_scenario())
+    assert counts["/portfolio", 1] == counts["/portfolio", 2] <= PORTFOLIO_MAX_QUERIES
+    assert counts["/portfolio/summary", 1] == counts["/portfolio/summary", 2] <= SUMMARY_MAX_QUERIES
@@ -0,0 +1,37 @@
+import os
+import numpy as np
+import pytest
+from app.services.price_cache import ROW_DTYPE, PriceCache
+
+
+def days(start: int, n: int) -> np.ndarray:
+    return (np.datetime64("2024-01-01") + np.arange(start, start + n)).astype("datetime64[D]")
+
+
+def test_append_after_torn_record_stays_aligned(tmp_path):
+    cache = PriceCache(str(tmp_path))
+    cache.write("aapl", days(0, 5), np.arange(5.0))
+    with open(tmp_path / "AAPL.prices", "ab") as f:
+        f.write(b"\x01\x02\x03")  # an append interrupted mid-record
+    assert len(cache.load("AAPL")[0]) == 5
+
+    cache.append("AAPL", days(5, 2), np.array([5.0, 6.0]))
+    dates, closes = cache.load("AAPL")
+    assert os.path.getsize(tmp_path / "AAPL.prices") == 7 * ROW_DTYPE.itemsize
+    assert (dates == days(0, 7)).all() and (closes == np.arange(7.0)).all()
+
+
+def test_same_size_rewrite_by_another_process_is_seen(tmp_path):
+    reader, writer = PriceCache(str(tmp_path)), PriceCache(str(tmp_path))
+    writer.write("MSFT", days(0, 3), np.ones(3))
+    assert reader.load("MSFT")[1][0] == 1.0
+    writer.write("MSFT", days(0, 3), np.full(3, 2.0))
+    assert reader.load("MSFT")[1][0] == 2.0
+
+
+@pytest.mark.parametrize("symbol", ["../../evil", "a/b", "", "TOOLONGSYMBOL"])
+def test_symbols_that_could_escape_the_root_are_rejected(tmp_path, symbol):
+    cache = PriceCache(str(tmp_path / "cache"))
+    with pytest.raises(ValueError):
+        cache.write(symbol, days(0, 1), np.ones(1))
+    assert os.listdir(tmp_path) == ["cache"] and os.listdir(tmp_path / "cache") == []
@@ -0,0 +1,34 @@
+import numpy as np
+from app.services.price_history import downsample, lttb
+
+
+def test_short_series_and_tiny_thresholds_are_kept_whole():
+    x = np.arange(10.0)
+    assert (lttb(x, x, 10) == np.arange(10)).all()
+    assert (lttb(x, x, 2) == np.arange(10)).all()
+
+
+def test_keeps_endpoints_and_threshold_points_in_order():
+    rng = np.random.default_rng(0)
+    x = np.arange(5000.0)
+    y = np.cumsum(rng.normal(size=5000))
+    kept = lttb(x, y, 500)
+    assert len(kept) == 500 and kept[0] == 0 and kept[-1] == 4999
+    assert (np.diff(kept) > 0).all()
+
+
+def test_spikes_survive_downsampling_that_striding_would_drop():
+    x = np.arange(1000.0)
+    y = np.zeros(1000)
+    y[333], y[667] = 50.0, -50.0
+    kept = lttb(x, y, 20)
+    assert 333 in kept and 667 in kept
+    assert 333 not in np.arange(0, 1000, 1000 // 20)
+
+
+def test_downsample_returns_matching_dates_and_closes():
+    dates = np.datetime64("2020-01-01") + np.arange(300)
+    closes = np.linspace(1.0, 2.0, 300)
+    d, c = downsample(dates, closes, 50)
+    assert len(d) == len(c) == 50
+    assert d[0] == dates[0] and d[-1] == dates[-1] and c[-1] == 2.0
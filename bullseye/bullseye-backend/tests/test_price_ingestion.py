@@ -0,0 +1,165 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from app.services import price_ingestion
+from app.services.price_ingestion import ingest_symbol, plan_ingestion
+
+TODAY = date(2024, 6, 12)  # a Wednesday: the last expected bar is 2024-06-11
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+def state(last_stored_date=None, full_fetch_days_ago=None, needs_backfill=False, last_success_at=None):
+    return SimpleNamespace(
+        last_stored_date=last_stored_date,
+        last_full_fetch_at=datetime.utcnow() - timedelta(days=full_fetch_days_ago) if full_fetch_days_ago is not None else None,
+        needs_backfill=needs_backfill,
+        last_success_at=last_success_at,
+    )
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Stand-ins for the three watermark queries plan_ingestion makes, plus recorded state writes."""
+    data = SimpleNamespace(states={}, ranges={}, holes=set(), saved=[])
+
+    async def get_ingestion_states(db, symbols):
+        return data.states
+
+    async def get_stored_price_ranges(db, symbols):
+        return data.ranges
+
+    async def find_symbols_with_price_gaps(db, symbols):
+        return data.holes
+
+    async def save_ingestion_state(db, symbol, commit=True, **values):
+        data.saved.append((symbol, values))
+
+    for fn in (get_ingestion_states, get_stored_price_ranges, find_symbols_with_price_gaps, save_ingestion_state):
+        monkeypatch.setattr(price_ingestion, fn.__name__, fn)
+    return data
+
+
+def test_plan_decides_new_backfill_gap_and_skip(stored):
+    stored.ranges = {
+        "CUR": (date(2020, 1, 2), date(2024, 6, 11)),
+        "GAP": (date(2020, 1, 2), date(2024, 6, 7)),
+        "OLD": (date(2020, 1, 2), date(2023, 1, 3)),
+        "HOLE": (date(2020, 1, 2), date(2024, 6, 11)),
+        "WAIT": (date(2020, 1, 2), date(2024, 6, 10)),
+    }
+    stored.states = {"HOLE": state(full_fetch_days_ago=60), "WAIT": state(full_fetch_days_ago=2)}
+    stored.holes = {"HOLE", "WAIT"}
+    db = FakeSession()
+
+    plans = asyncio.run(plan_ingestion(db, ["new", "cur", "gap", "old", "hole", "wait"], today=TODAY))
+    decided = {p["symbol"]: (p["reason"], p["outputsize"], p["since"]) for p in plans}
+
+    assert decided == {
+        "NEW": ("new", "full", None),
+        "GAP": ("gap", "compact", date(2024, 6, 7)),
+        "OLD": ("gap", "full", date(2023, 1, 3)),
+        "HOLE": ("backfill", "full", None),
+        "WAIT": ("gap", "compact", date(2024, 6, 10)),
+    }
+    # Holes found inside the retry window are remembered for later instead of refetched now
+    assert stored.saved == [("WAIT", {"needs_backfill": True})] and db.commits == 1
+
+
+def test_plan_skips_symbols_already_fetched_today(stored):
+    stored.ranges = {"HOL": (date(2020, 1, 2), date(2024, 6, 7))}
+    stored.states = {"HOL": state(full_fetch_days_ago=2, last_success_at=datetime(2024, 6, 12, 9))}
+    assert asyncio.run(plan_ingestion(FakeSession(), ["HOL"], today=TODAY)) == []
+
+
+def bar(close, dividend=0.0, split=1.0):
+    return {
+        "1. open": close, "2. high": close, "3. low": close, "4. close": close,
+        "5. adjusted close": close, "6. volume": "100",
+        "7. dividend amount": str(dividend), "8. split coefficient": str(split),
+    }
+
+
+class FakeAlphaVantage:
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.calls = []
+
+    async def get_daily_adjusted_time_series(self, symbol, outputsize="compact"):
+        self.calls.append(outputsize)
+        return self.payloads[outputsize]
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Capture what ingest_symbol writes to the database and the column cache."""
+    data = SimpleNamespace(rows=[], states=[], rebuilds=[])
+
+    @asynccontextmanager
+    async def async_session():
+        yield FakeSession()
+
+    async def bulk_upsert_daily_prices(db, rows, commit=True):
+        data.rows.extend(rows)
+        return len(rows)
+
+    async def save_ingestion_state(db, symbol, commit=True, **values):
+        data.states.append(values)
+
+    async def sync_symbol(db, cache, symbol, rebuild=False):
+        data.rebuilds.append(rebuild)
+
+    async def update_symbol_indicators(db, symbol, rebuild=False):
+        pass
+
+    for fn in (async_session, bulk_upsert_daily_prices, save_ingestion_state, sync_symbol, update_symbol_indicators):
+        monkeypatch.setattr(price_ingestion, fn.__name__, fn)
+    return data
+
+
+GAP_PLAN = {"symbol": "AAPL", "outputsize": "compact", "since": date(2024, 6, 7), "first": date(2020, 1, 2), "reason": "gap"}
+
+
+def test_compact_fetch_keeps_only_bars_after_the_watermark(writes):
+    av = FakeAlphaVantage({"compact": {"2024-06-11": bar(3), "2024-06-10": bar(2), "2024-06-07": bar(1)}})
+    result = asyncio.run(ingest_symbol(av, GAP_PLAN))
+
+    assert result == {"rows": 2, "budget_exhausted": False}
+    assert sorted(r["date"] for r in writes.rows) == [date(2024, 6, 10), date(2024, 6, 11)]
+    assert writes.states[0]["first_stored_date"] == date(2020, 1, 2)
+    assert writes.states[0]["last_stored_date"] == date(2024, 6, 11)
+    assert "last_full_fetch_at" not in writes.states[0] and writes.rebuilds == [False]
+
+
+@pytest.mark.parametrize("new_bar", [bar(3, split=4.0), bar(3, dividend=0.24)])
+def test_corporate_action_in_new_bars_refetches_full_history(writes, new_bar):
+    full = {"2024-06-11": bar(3), "2024-06-10": bar(0.5), "2024-06-07": bar(0.25), "2020-01-02": bar(0.1)}
+    av = FakeAlphaVantage({"compact": {"2024-06-11": new_bar, "2024-06-10": bar(2)}, "full": full})
+    result = asyncio.run(ingest_symbol(av, GAP_PLAN))
+
+    assert av.calls == ["compact", "full"]
+    assert result["rows"] == 4 and len(writes.rows) == 4  # earlier adjusted closes rewritten too
+    assert writes.states[0]["last_full_fetch_at"] is not None and writes.rebuilds == [True]
+
+
+def test_corporate_action_before_the_watermark_is_already_stored(writes):
+    av = FakeAlphaVantage({"compact": {"2024-06-11": bar(3), "2024-06-07": bar(1, split=2.0)}})
+    asyncio.run(ingest_symbol(av, GAP_PLAN))
+    assert av.calls == ["compact"] and writes.rebuilds == [False]
+
+
+def test_failed_refetch_writes_nothing_so_the_next_run_retries(writes):
+    av = FakeAlphaVantage({"compact": {"2024-06-11": bar(3, split=2.0)}, "full": {"error": "quota", "budget_exhausted": True}})
+    result = asyncio.run(ingest_symbol(av, GAP_PLAN))
+
+    assert result == {"rows": 0, "budget_exhausted": True}
+    assert writes.rows == [] and writes.rebuilds == []
+    assert "last_success_at" not in writes.states[0]
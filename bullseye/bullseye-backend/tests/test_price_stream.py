@@ -0,0 +1,49 @@
+import asyncio
+from app.services.alpha_vantage_service import QuoteCache
+from app.services.price_stream import PriceHub, Subscription
+
+
+def test_slow_consumer_gets_only_the_latest_quote_per_symbol():
+    async def scenario():
+        subscription = Subscription()
+        subscription.push("AAPL", {"price": 1})
+        subscription.push("AAPL", {"price": 2})
+        subscription.push("MSFT", {"price": 3})
+        first = await subscription.next_batch()
+        subscription.push("AAPL", {"price": 4})
+        return first, await subscription.next_batch(), subscription.coalesced
+
+    first, second, coalesced = asyncio.run(scenario())
+    assert first == {"AAPL": {"price": 2}, "MSFT": {"price": 3}}
+    assert second == {"AAPL": {"price": 4}} and coalesced == 1
+
+
+class FakeAlphaVantage:
+    def __init__(self):
+        self.quote_cache = QuoteCache(ttl=60)
+        self.warmed = []
+
+    async def warm_stock_quote(self, symbol):
+        self.warmed.append(symbol)
+        self.quote_cache.set(symbol, {"price": 10.0})
+        return True
+
+
+def test_one_refresh_loop_per_symbol_however_many_subscribers():
+    async def scenario():
+        av = FakeAlphaVantage()
+        hub = PriceHub(av, interval=0.01)
+        clients = [Subscription() for _ in range(3)]
+        for client in clients:
+            hub.subscribe(client, ["aapl"])
+        batches = await asyncio.gather(*(client.next_batch() for client in clients))
+        await asyncio.sleep(0.05)
+        stats = hub.stats()
+        hub.unsubscribe(clients[0])
+        await hub.close()
+        return av, batches, stats
+
+    av, batches, stats = asyncio.run(scenario())
+    assert av.warmed == ["AAPL"]  # later ticks reuse the fresh cached quote
+    assert all(batch == {"AAPL": {"price": 10.0}} for batch in batches)
+    assert stats["symbols"] == 1 and stats["symbol_subscriptions"] == 3 and stats["published"] == 1
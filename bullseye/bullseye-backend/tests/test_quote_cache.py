@@ -0,0 +1,71 @@
+import asyncio
+from app.services.alpha_vantage_service import QuoteCache
+
+
+def test_concurrent_misses_share_one_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"price": 1.0}
+
+    async def scenario():
+        cache = QuoteCache(ttl=60)
+        results = await asyncio.gather(*(cache.get_or_fetch("AAPL", fetch) for _ in range(5)))
+        return cache, results
+
+    cache, results = asyncio.run(scenario())
+    assert len(calls) == 1 and all(r == {"price": 1.0} for r in results)
+    assert cache.stats()["misses"] == 5 and cache.coalesced == 4 and cache.stats()["inflight"] == 0
+
+
+def test_fresh_entries_are_hits_and_expired_ones_stay_as_last_known(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.alpha_vantage_service.time.monotonic", lambda: now[0])
+    cache = QuoteCache(ttl=30)
+    cache.set("AAPL", {"price": 1.0})
+
+    now[0] += 29
+    assert cache.get("AAPL") == {"price": 1.0} and cache.ttl_remaining("AAPL") == 1.0
+    now[0] += 2
+    assert cache.get("AAPL") is None and cache.stored_at("AAPL") is None
+    assert cache.get_stale("AAPL") == ({"price": 1.0}, 31.0)
+
+
+def test_failed_fetches_are_not_cached():
+    async def fetch():
+        return None
+
+    async def scenario():
+        cache = QuoteCache(ttl=60)
+        await cache.get_or_fetch("NOPE", fetch)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.get_stale("NOPE") is None
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_fetch():
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return {"price": 2.0}
+
+    async def scenario():
+        cache = QuoteCache(ttl=60)
+        first = asyncio.create_task(cache.get_or_fetch("MSFT", fetch))
+        second = asyncio.create_task(cache.get_or_fetch("MSFT", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, cache.get("MSFT")
+
+    assert asyncio.run(scenario()) == ({"price": 2.0}, {"price": 2.0})
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = QuoteCache(ttl=60, max_entries=2)
+    cache.set("A", 1)
+    cache.set("B", 2)
+    cache.get("A")
+    cache.set("C", 3)
+    assert cache.get_stale("B") is None and cache.get("A") == 1 and cache.get("C") == 3
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from app.services.rate_scheduler import BudgetExhausted, Priority, UpstreamScheduler
+
+
+def test_waiters_are_served_by_priority_then_fifo():
+    async def scenario():
+        scheduler = UpstreamScheduler(calls_per_minute=1200, calls_per_day=1000)
+        scheduler.minute_bucket.tokens = 0  # refills twenty calls per second
+        order = []
+
+        async def call(name, priority):
+            await scheduler.acquire(priority, max_wait=10)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(call("warming", Priority.WARMING)),
+            asyncio.create_task(call("ingestion", Priority.INGESTION)),
+            asyncio.create_task(call("interactive-1", Priority.INTERACTIVE)),
+            asyncio.create_task(call("interactive-2", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        scheduler._dispatcher.cancel()
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive-1", "interactive-2", "ingestion", "warming"]
+
+
+def test_interactive_gives_up_when_the_day_is_spent():
+    async def scenario():
+        scheduler = UpstreamScheduler(calls_per_minute=5, calls_per_day=25)
+        scheduler.day_bucket.tokens = 0
+        with pytest.raises(BudgetExhausted):
+            await scheduler.acquire(Priority.INTERACTIVE, max_wait=0.1)
+        return scheduler.rejected["interactive"]
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_idle_warming_keeps_the_minute_and_daily_reserves():
+    scheduler = UpstreamScheduler(calls_per_minute=5, calls_per_day=25, warming_day_reserve_fraction=0.6)
+    assert [scheduler.try_acquire_idle(reserve=2) for _ in range(4)] == [True, True, True, False]
+
+    granted = 3
+    for _ in range(100):
+        scheduler.minute_bucket.tokens = 5
+        granted += scheduler.try_acquire_idle(reserve=2)
+    assert granted == 10
+    assert scheduler.day_bucket.available() >= scheduler.warming_day_reserve == 15
+
+
+def test_idle_warming_yields_to_queued_requests():
+    async def scenario():
+        scheduler = UpstreamScheduler(calls_per_minute=5, calls_per_day=25)
+        scheduler.minute_bucket.tokens = 0
+        waiter = asyncio.create_task(scheduler.acquire(Priority.INGESTION, max_wait=0.05))
+        await asyncio.sleep(0)
+        scheduler.minute_bucket.tokens = 5
+        idle = scheduler.try_acquire_idle(reserve=0)
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler._dispatcher.cancel()
+        return idle
+
+    assert asyncio.run(scenario()) is False
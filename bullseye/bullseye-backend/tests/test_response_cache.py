@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.services import response_cache as rc
+from app.services.response_cache import cached_json_response, invalidate_user_responses, user_version
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    rc.response_cache.invalidate()
+    rc._user_versions.clear()
+    yield
+    rc.response_cache.invalidate()
+    rc._user_versions.clear()
+
+
+def get(key, payload, if_none_match=None, version=0):
+    computed = []
+
+    async def compute():
+        computed.append(1)
+        return payload, []
+
+    request = SimpleNamespace(headers={"if-none-match": if_none_match} if if_none_match else {})
+    response = asyncio.run(cached_json_response(request, key, compute, version))
+    return response, bool(computed)
+
+
+def expire(key):
+    stored_at, entry = rc.response_cache._entries[key]
+    rc.response_cache._entries[key] = (stored_at - rc.RESPONSE_CACHE_TTL_SECONDS - 1, entry)
+
+
+def test_matching_if_none_match_gets_304_from_the_cache():
+    first, computed = get("portfolio_cash:1", {"cash_balance": 10})
+    assert first.status_code == 200 and computed and first.body == b'{"cash_balance":10}'
+    etag = first.headers["etag"]
+
+    again, computed = get("portfolio_cash:1", {"cash_balance": 10}, if_none_match=f"W/{etag}")
+    assert again.status_code == 304 and not computed and again.headers["etag"] == etag
+    assert get("portfolio_cash:1", {}, if_none_match='"other"')[0].status_code == 200
+
+
+def test_write_changes_the_etag_when_the_body_changes():
+    etag = get("portfolio_cash:1", {"cash_balance": 10})[0].headers["etag"]
+    invalidate_user_responses(1)
+
+    response, computed = get("portfolio_cash:1", {"cash_balance": 25}, if_none_match=etag, version=user_version(1))
+    assert computed and response.status_code == 200 and response.headers["etag"] != etag
+
+
+def test_rebuilt_identical_body_keeps_its_etag():
+    etag = get("stock:AAPL", {"price": 1})[0].headers["etag"]
+    expire("stock:AAPL")
+    response, computed = get("stock:AAPL", {"price": 1}, if_none_match=etag)
+    assert computed and response.status_code == 304
+
+    expire("stock:AAPL")
+    response, computed = get("stock:AAPL", {"price": 2}, if_none_match=etag)
+    assert computed and response.status_code == 200
+
+
+def test_user_versions_are_dropped_once_no_entry_needs_them():
+    for user_id in range(100):
+        invalidate_user_responses(user_id)
+    get("portfolio:7", [], version=user_version(7))
+    for user_id, (version, bumped_at) in list(rc._user_versions.items()):
+        rc._user_versions[user_id] = (version, bumped_at - rc.RESPONSE_CACHE_TTL_SECONDS - 1)
+
+    invalidate_user_responses(200)
+    assert set(rc._user_versions) == {7, 200}
+    assert get("portfolio:7", [], version=user_version(7))[1] is False  # user 7's entry is still current